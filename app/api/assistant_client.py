@@ -1,15 +1,34 @@
-import os
-import time
-import json
-from typing import Any, Optional
-from openai import OpenAI
+import asyncio
+import msgspec
+from typing import Callable, List, Optional
+from app import config
 from app.utils.logger import get_logger
-from app.models.schema import SalesAnalysisResponse, AugmentedResponse, MarketInsights, NewMarketInsights
-from pydantic_core import from_json
+from app.api.http_client import get_openai_client
+from app.utils.async_runner import run_async
+from app.models.schema import SalesAnalysisResponse, AugmentedResponse, NewMarketInsights, NewMarketInsightsStruct
 
 # Initialize logger
 logger = get_logger()
 
+# Build the decoder once at import time and reuse it for every response
+_INSIGHTS_DECODER = msgspec.json.Decoder(NewMarketInsightsStruct)
+
+# Number of Assistant runs in flight at once when augmenting responses in a batch
+_AUGMENT_CONCURRENCY = 8
+
+# Message template sent to the Assistant, built once at import time
+_MESSAGE_CONTENT_TEMPLATE = """
+        Please provide market insights to augment this sales forecast:
+        
+        Product: {product}
+        Time Period: {time_period}
+        
+        Initial Forecast (based on historical data):
+        {response_text}
+        
+        Provide only the JSON object in your instructions without any additional text or markdown formatting.
+        """
+
 class AssistantClient:
     """
     Client for interacting with the OpenAI Assistant API.
@@ -18,8 +37,8 @@ class AssistantClient:
         """
         Initialize the Assistant client.
         """
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        self.assistant_id = os.getenv("OPENAI_ASSISTANT_ID")
+        self.api_key = config.OPENAI_API_KEY
+        self.assistant_id = config.OPENAI_ASSISTANT_ID
         
         if not self.api_key:
             logger.error("OpenAI API key not found in environment variables")
@@ -29,15 +48,39 @@ class AssistantClient:
             logger.error("OpenAI Assistant ID not found in environment variables")
             raise ValueError("OpenAI Assistant ID not found. Please set the OPENAI_ASSISTANT_ID environment variable.")
         
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = get_openai_client(self.api_key)
         logger.info("Assistant client initialized successfully")
         
-    def augment_sales_response(self, sales_response: SalesAnalysisResponse) -> AugmentedResponse:
+    def augment_sales_response(
+        self,
+        sales_response: SalesAnalysisResponse,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> AugmentedResponse:
         """
         Augment a sales response with market insights from the Assistant.
+        Blocking wrapper around aaugment_sales_response.
         
         Args:
             sales_response (SalesAnalysisResponse): The initial sales response with structured data
+            on_delta (Optional[Callable]): Called with each piece of the Assistant's response text as it arrives
+            
+        Returns:
+            AugmentedResponse: The augmented response with market insights
+        """
+        return run_async(self.aaugment_sales_response(sales_response, on_delta))
+        
+    async def aaugment_sales_response(
+        self,
+        sales_response: SalesAnalysisResponse,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> AugmentedResponse:
+        """
+        Augment a sales response with market insights from the Assistant.
+        on_delta is called on the event loop, so it should only hand the text over.
+        
+        Args:
+            sales_response (SalesAnalysisResponse): The initial sales response with structured data
+            on_delta (Optional[Callable]): Called with each piece of the Assistant's response text as it arrives
             
         Returns:
             AugmentedResponse: The augmented response with market insights
@@ -53,57 +96,43 @@ class AssistantClient:
             logger.info(f"Augmenting sales response for product: {product}, time period: {time_period}")
             
             # Create a thread
-            thread = self.client.beta.threads.create()
+            thread = await self.client.beta.threads.create()
             
             # Add a message to the thread
             message_content = self._create_message_content(sales_response, product, time_period)
-            logger.debug(f"Message content being sent to Assistant:\n{message_content}")
+            logger.debug("Message content being sent to Assistant:\n{}", message_content)
             
-            self.client.beta.threads.messages.create(
+            await self.client.beta.threads.messages.create(
                 thread_id=thread.id,
                 role="user",
                 content=message_content
             )
             logger.info("Message added to thread")
             
-            # Run the assistant
-            run = self.client.beta.threads.runs.create(
-                thread_id=thread.id,
-                assistant_id=self.assistant_id
-            )
-            logger.info(f"Assistant run created with ID: {run.id}")
+            # Run the assistant and stream its response, so the text arrives as it is
+            # generated instead of polling the run and listing the messages afterwards
             logger.info(f"Using assistant ID: {self.assistant_id}")
-            
-            # Wait for the run to complete
-            run = self._wait_for_run(thread.id, run.id)
-            
-            # Get the assistant's response
-            messages = self.client.beta.threads.messages.list(
-                thread_id=thread.id,
-                order="desc",
-                limit=1
-            )
-            
-            # Extract the assistant's response
-            assistant_response = messages.data[0].content[0].text.value
+            assistant_response = await self._stream_run(thread.id, on_delta)
             
             try:
-                new_market_insights = NewMarketInsights.model_validate(from_json(assistant_response))
-                logger.debug(f"New market insights: {new_market_insights.market_trends}")
-                logger.debug(f"New market insights: {new_market_insights.competitive_landscape}")
-                logger.debug(f"New market insights: {new_market_insights.regulatory_considerations}")
-            except ValueError as e:
-                logger.error(f"Error parsing json model into pydantic model NewMarketInsights")
+                new_market_insights = _INSIGHTS_DECODER.decode(assistant_response).to_model()
+                logger.debug("New market insights: {}", new_market_insights.market_trends)
+                logger.debug("New market insights: {}", new_market_insights.competitive_landscape)
+                logger.debug("New market insights: {}", new_market_insights.regulatory_considerations)
+            except (msgspec.ValidationError, msgspec.DecodeError) as e:
+                logger.error(f"Error parsing json model into pydantic model NewMarketInsights: {str(e)}")
 
-                # market_insights = MarketInsights(
-                #     market_trends=[{"description": "Could not parse market trends", "impact": "Unknown"}],
-                #     competitive_landscape=[{"description": "Could not parse competitive landscape", "impact": "Unknown"}],
-                #     regulatory_considerations=[{"description": "Could not parse regulatory considerations", "impact": "Unknown"}]
-                # )
-                  
-           
-            # Create augmented response
-            augmented_response = AugmentedResponse(
+                # Degrade to empty market insights so the historical analysis can still be
+                # shown, rather than failing the whole augmentation
+                new_market_insights = NewMarketInsights(
+                    market_trends=[],
+                    competitive_landscape=[],
+                    regulatory_considerations=[]
+                )
+            
+            # Create augmented response. Both parts were just validated (the sales response by
+            # the SDK, the insights above), so skip validating them a second time.
+            augmented_response = AugmentedResponse.model_construct(
                 initial_response=sales_response,
                 market_insights=new_market_insights
             )
@@ -115,6 +144,48 @@ class AssistantClient:
             logger.error(f"Error augmenting sales response: {str(e)}")
             raise
     
+    def augment_sales_responses(
+        self,
+        sales_responses: List[SalesAnalysisResponse],
+        concurrency: int = _AUGMENT_CONCURRENCY
+    ) -> List[AugmentedResponse]:
+        """
+        Augment several sales responses with market insights concurrently.
+        Blocking wrapper around aaugment_sales_responses.
+        
+        Args:
+            sales_responses (List[SalesAnalysisResponse]): The initial sales responses
+            concurrency (int): Maximum number of Assistant runs in flight at once
+            
+        Returns:
+            List[AugmentedResponse]: The augmented responses, in the order of the sales responses
+        """
+        return run_async(self.aaugment_sales_responses(sales_responses, concurrency))
+    
+    async def aaugment_sales_responses(
+        self,
+        sales_responses: List[SalesAnalysisResponse],
+        concurrency: int = _AUGMENT_CONCURRENCY
+    ) -> List[AugmentedResponse]:
+        """
+        Augment several sales responses with market insights concurrently.
+        Each response is decoded by the shared msgspec decoder as its run completes.
+        
+        Args:
+            sales_responses (List[SalesAnalysisResponse]): The initial sales responses
+            concurrency (int): Maximum number of Assistant runs in flight at once
+            
+        Returns:
+            List[AugmentedResponse]: The augmented responses, in the order of the sales responses
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def augment_one(sales_response: SalesAnalysisResponse) -> AugmentedResponse:
+            async with semaphore:
+                return await self.aaugment_sales_response(sales_response)
+        
+        return await asyncio.gather(*(augment_one(sales_response) for sales_response in sales_responses))
+    
     def _create_message_content(self, sales_response: SalesAnalysisResponse, product: str, time_period: str) -> str:
         """
         Create the message content to send to the Assistant.
@@ -127,46 +198,69 @@ class AssistantClient:
         Returns:
             str: The message content
         """
-        return f"""
-        Please provide market insights to augment this sales forecast:
-        
-        Product: {product}
-        Time Period: {time_period}
-        
-        Initial Forecast (based on historical data):
-        {sales_response.response_text}
-        
-        Provide only the JSON object in your instructions without any additional text or markdown formatting.
-        """
+        return _MESSAGE_CONTENT_TEMPLATE.format(
+            product=product,
+            time_period=time_period,
+            response_text=sales_response.response_text
+        )
     
-    def _wait_for_run(self, thread_id: str, run_id: str, max_wait_seconds: int = 120) -> Any:
+    async def _stream_run(
+        self,
+        thread_id: str,
+        on_delta: Optional[Callable[[str], None]] = None,
+        max_wait_seconds: int = 120
+    ) -> bytearray:
         """
-        Wait for a run to complete.
+        Run the Assistant on a thread and collect the streamed response as UTF-8 bytes.
         
         Args:
             thread_id (str): The thread ID
-            run_id (str): The run ID
+            on_delta (Optional[Callable]): Called with each text delta as it arrives
             max_wait_seconds (int): Maximum time to wait in seconds
             
         Returns:
-            Any: The completed run
+            bytearray: The UTF-8 encoded text of the Assistant's response
         """
-        start_time = time.time()
-        while time.time() - start_time < max_wait_seconds:
-            run = self.client.beta.threads.runs.retrieve(
-                thread_id=thread_id,
-                run_id=run_id
-            )
-            
-            if run.status == "completed":
-                return run
-            elif run.status in ["failed", "cancelled", "expired"]:
-                logger.error(f"Run failed with status: {run.status}")
-                raise Exception(f"Assistant run failed with status: {run.status}")
+        try:
+            return await asyncio.wait_for(self._collect_run_text(thread_id, on_delta), timeout=max_wait_seconds)
+        except asyncio.TimeoutError:
+            # If we've exceeded the max wait time
+            logger.error("Run timed out")
+            raise Exception("Assistant run timed out")
+    
+    async def _collect_run_text(
+        self,
+        thread_id: str,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> bytearray:
+        """
+        Stream a run and collect the text deltas of the Assistant's message.
+        The deltas are encoded into a single buffer as they arrive, so the full
+        response is never held as a str and can be validated straight from bytes.
+        
+        Args:
+            thread_id (str): The thread ID
+            on_delta (Optional[Callable]): Called with each text delta as it arrives
             
-            # Wait before checking again
-            time.sleep(1)
+        Returns:
+            bytearray: The UTF-8 encoded text of the Assistant's response
+        """
+        buffer = bytearray()
+        async with self.client.beta.threads.runs.stream(
+            thread_id=thread_id,
+            assistant_id=self.assistant_id
+        ) as stream:
+            async for event in stream:
+                if event.event == "thread.run.created":
+                    logger.info(f"Assistant run created with ID: {event.data.id}")
+                elif event.event == "thread.message.delta":
+                    for content in event.data.delta.content or []:
+                        if content.type == "text" and content.text and content.text.value:
+                            buffer += content.text.value.encode()
+                            if on_delta is not None:
+                                on_delta(content.text.value)
+                elif event.event in ["thread.run.failed", "thread.run.cancelled", "thread.run.expired"]:
+                    logger.error(f"Run failed with status: {event.data.status}")
+                    raise Exception(f"Assistant run failed with status: {event.data.status}")
         
-        # If we've exceeded the max wait time
-        logger.error("Run timed out")
-        raise Exception("Assistant run timed out")
+        return buffer
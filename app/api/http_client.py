@@ -0,0 +1,56 @@
+import threading
+import httpx
+import openai
+from typing import Dict
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+# Shared connection pool for all OpenAI clients in the process, so keep-alive
+# connections (and their TLS sessions) are reused across API calls. HTTP/2 lets
+# concurrent requests share a single connection.
+http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=64),
+    timeout=60.0,
+)
+logger.info("Shared HTTP client initialized")
+
+# Number of retries for failed OpenAI requests. The SDK retries rate limits (429),
+# server errors, timeouts and connection errors with exponential backoff and jitter.
+MAX_RETRIES = 5
+
+# One OpenAI client per API key for the whole process
+_openai_clients: Dict[str, openai.AsyncOpenAI] = {}
+_openai_clients_lock = threading.Lock()
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the shared HTTP client instance.
+    
+    Returns:
+        httpx.AsyncClient: Shared HTTP client with a pooled connection limit
+    """
+    return http_client
+
+def get_openai_client(api_key: str) -> openai.AsyncOpenAI:
+    """
+    Returns the shared OpenAI client for an API key, creating it on first use.
+    
+    Args:
+        api_key (str): The OpenAI API key
+        
+    Returns:
+        openai.AsyncOpenAI: OpenAI client using the shared HTTP client
+    """
+    with _openai_clients_lock:
+        client = _openai_clients.get(api_key)
+        if client is None:
+            client = openai.AsyncOpenAI(
+                api_key=api_key,
+                http_client=get_http_client(),
+                max_retries=MAX_RETRIES
+            )
+            _openai_clients[api_key] = client
+            logger.info("Shared OpenAI client initialized")
+        return client
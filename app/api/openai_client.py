@@ -1,21 +1,288 @@
-from dataclasses import Field
-import os
-import json
+import re
+import time
+import asyncio
+import hashlib
 import openai
-from typing import Dict, Any, List
+import numpy as np
+import orjson
+import msgspec
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional, Tuple, Union
+from app import config
 from app.data.inventory import inventory_service
 from app.utils.logger import get_logger
-from app.models.schema import InventoryResponse, SalesQuery, SalesAnalysisResponse, InventoryResponseSchema
-from dotenv import load_dotenv
-from pydantic import BaseModel, Field
-import traceback
-from pydantic_core import from_json
-
-# Load environment variables
-load_dotenv()
+from app.api.http_client import get_openai_client
+from app.utils.async_runner import run_async
+from app.api.semantic_cache import SemanticCache
+from app.models.schema import InventoryResponse, InventoryResponseStruct, SalesQuery, SalesAnalysisResponse, InventoryResponseSchema
+from pydantic import TypeAdapter
 
 logger = get_logger()
 
+# Caps the number of OpenAI requests in flight at once, to stay below the rate limits
+# when many queries are processed concurrently
+_API_CONCURRENCY = 8
+_API_SEMAPHORE = asyncio.Semaphore(_API_CONCURRENCY)
+
+# Build the decoder once at import time and reuse it for every response
+_INVENTORY_DECODER = msgspec.json.Decoder(InventoryResponseStruct)
+
+# Serializes cached sales responses to JSON bytes and validates them straight from
+# bytes, without going through str
+_SALES_RESPONSE_ADAPTER = TypeAdapter(SalesAnalysisResponse)
+
+# System message template, built once at import time. The static instructions come
+# first and the sales data last, so the instructions form a stable prompt prefix that
+# OpenAI's automatic prompt caching can reuse.
+_SYSTEM_MESSAGE_TEMPLATE = """
+        You are an AI assistant specialized in sales forecasting and analysis.
+        You have access to historical sales data for various food bar products.
+        
+        When responding to queries:
+        1. Provide accurate information based on the available data.
+        2. If a forecast is requested, give a reasonable estimate based on historical trends.
+        3. Be clear about the limitations of your forecast.
+        4. Keep responses concise but informative.
+        5. If you don't know the answer or the data is insufficient, say so.
+        6. Carefully identify all products mentioned in the query.
+        7. Identify the time period mentioned in the query (e.g., next month, this quarter, next year).
+        
+        Your response will be in JSON format with these fields:
+        - products: An array of product names mentioned in the query
+        - time_period: The time period mentioned in the query
+        - forecast_text: Your natural language response to the query
+        
+        Now, analyze the user's query and provide the best response you can.
+        
+        The available sales data includes:
+        {sales_data_json}
+        """
+
+# Structured outputs are generated deterministically and capped in length. The sales
+# response carries a free-text forecast, so it gets more room than the inventory calls.
+_SALES_MAX_TOKENS = 1024
+_INVENTORY_MAX_TOKENS = 512
+
+# Tool definitions and system message for inventory queries, built once at import time
+_INVENTORY_TOOLS = (
+    {
+        "name": "get_inventory",
+        "description": "Get the inventory of the product",
+        "type": "function",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "product_name": {
+                    "type": "string",
+                    "description": "The name of the product",
+                }
+            },
+            "required": ["product_name"],
+            "additionalProperties": False,
+        },
+        "strict": True,
+    },
+)
+
+_INVENTORY_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a helpful assistant that can answer questions about the inventory of an FMCG company.",
+}
+
+# Built system messages per sales data summary, keyed by a digest of the summary JSON,
+# so a reload of the same data, or another session, reuses the message. Changed data
+# gets a new digest, so no explicit invalidation is needed. The digest is computed once
+# when the summary is loaded, so looking up the message does not scale with the data.
+_SYSTEM_MESSAGE_CACHE: "OrderedDict[bytes, str]" = OrderedDict()
+_SYSTEM_MESSAGE_CACHE_SIZE = 32
+
+
+# Responses to previously answered sales queries, keyed by a digest of the model, the
+# sales data digest and the query text. Values are the
+# response JSON with the time it was cached, so no large objects are kept alive.
+_RESPONSE_CACHE: "OrderedDict[bytes, Tuple[float, bytes]]" = OrderedDict()
+_RESPONSE_CACHE_SIZE = 1024
+_RESPONSE_CACHE_TTL_SECONDS = 3600
+
+# Responses to near-duplicate sales queries, matched on query embeddings. Entries are
+# partitioned by the words that set the period of a query, since queries such as
+# "next month" and "next quarter" embed closely but need different answers.
+_EMBEDDING_MODEL = "text-embedding-3-small"
+_SEMANTIC_CACHE = SemanticCache(threshold=0.97, max_partitions=64)
+_SEMANTIC_LOOKUP_TIMEOUT_SECONDS = 0.5
+_QUERY_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_PERIOD_TERMS = frozenset({
+    "day", "days", "daily", "week", "weeks", "weekly", "month", "months", "monthly",
+    "quarter", "quarters", "quarterly", "year", "years", "yearly", "annual",
+    "today", "yesterday", "tomorrow", "last", "next", "this", "previous", "current", "past", "coming",
+    "january", "february", "march", "april", "may", "june", "july", "august",
+    "september", "october", "november", "december", "q1", "q2", "q3", "q4",
+})
+
+
+def _cache_put(cache: OrderedDict, key: Any, value: Any, max_size: int) -> None:
+    """
+    Add an entry to a bounded cache, evicting the least recently used entry.
+
+    Args:
+        cache (OrderedDict): The cache to add to
+        key (Any): The cache key
+        value (Any): The value to cache
+        max_size (int): Maximum number of entries in the cache
+    """
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > max_size:
+        cache.popitem(last=False)
+
+
+def sales_data_digest(sales_data_summary_json: bytes) -> bytes:
+    """
+    Compute the digest identifying a sales data summary. Meant to be computed once,
+    when the summary is loaded, and passed along with it.
+
+    Args:
+        sales_data_summary_json (bytes): Summary of sales data, serialized at load time
+
+    Returns:
+        bytes: Digest of the summary
+    """
+    return hashlib.blake2b(sales_data_summary_json, digest_size=16).digest()
+
+
+def _get_system_message(sales_data_summary_json: bytes, digest: bytes) -> str:
+    """
+    Get the system message for a sales data summary, building it only once per summary.
+
+    Args:
+        sales_data_summary_json (bytes): Summary of sales data, serialized at load time
+        digest (bytes): Digest of the summary, from sales_data_digest
+
+    Returns:
+        str: The system message
+    """
+    system_message = _SYSTEM_MESSAGE_CACHE.get(digest)
+    if system_message is None:
+        # Fill in the precompiled template
+        system_message = _SYSTEM_MESSAGE_TEMPLATE.format(sales_data_json=sales_data_summary_json.decode())
+        logger.debug("System message built for new sales data summary")
+
+    _cache_put(_SYSTEM_MESSAGE_CACHE, digest, system_message, _SYSTEM_MESSAGE_CACHE_SIZE)
+    return system_message
+
+
+def _data_cache_key(model: str, digest: bytes) -> bytes:
+    """
+    Build the cache key for the model and the sales data a query is answered with.
+
+    Args:
+        model (str): The OpenAI model answering the query
+        digest (bytes): Digest of the sales data summary, from sales_data_digest
+
+    Returns:
+        bytes: Digest identifying the model and sales data
+    """
+    return hashlib.blake2b(model.encode() + b"\0" + digest, digest_size=16).digest()
+
+
+def _response_cache_key(data_key: bytes, query_text: str) -> bytes:
+    """
+    Build the response cache key for a sales query.
+
+    Args:
+        data_key (bytes): Key for the model and sales data
+        query_text (str): The query text
+
+    Returns:
+        bytes: Digest identifying the query
+    """
+    return hashlib.blake2b(data_key + query_text.encode(), digest_size=16).digest()
+
+
+def _semantic_cache_key(data_key: bytes, query_text: str) -> bytes:
+    """
+    Build the semantic cache partition for a sales query, from the model and sales data
+    and the numbers and period words in the query, in order.
+
+    Args:
+        data_key (bytes): Key for the model and sales data
+        query_text (str): The query text
+
+    Returns:
+        bytes: Digest identifying the partition
+    """
+    period_terms = " ".join(
+        token for token in _QUERY_TOKEN_PATTERN.findall(query_text.lower())
+        if token.isdigit() or token in _PERIOD_TERMS
+    )
+    return hashlib.blake2b(data_key + b"\0" + period_terms.encode(), digest_size=16).digest()
+
+
+def _mentions_products(query_text: str, sales_response: SalesAnalysisResponse) -> bool:
+    """
+    Check that a query names every product of a response, so a near-duplicate query
+    about another product does not reuse the response.
+
+    Args:
+        query_text (str): The query text
+        sales_response (SalesAnalysisResponse): The cached response
+
+    Returns:
+        bool: True if every product name occurs in the query
+    """
+    query_text = query_text.lower()
+    return all(product.name.lower() in query_text for product in sales_response.products)
+
+
+def _response_cache_get(key: bytes) -> Optional[bytes]:
+    """
+    Get a cached response, dropping it if it has expired.
+
+    Args:
+        key (bytes): The response cache key
+
+    Returns:
+        Optional[bytes]: The cached response JSON, or None on a miss
+    """
+    cached = _RESPONSE_CACHE.get(key)
+    if cached is None:
+        return None
+
+    cached_at, response_json = cached
+    if time.monotonic() - cached_at > _RESPONSE_CACHE_TTL_SECONDS:
+        del _RESPONSE_CACHE[key]
+        return None
+
+    _RESPONSE_CACHE.move_to_end(key)
+    return response_json
+
+
+def _build_inventory_response(
+    inventory_by_name: Dict[str, Optional[inventory_service.InventoryItem]]
+) -> InventoryResponse:
+    """
+    Build the inventory response directly from the inventory lookups.
+
+    Args:
+        inventory_by_name (Dict[str, Optional[InventoryItem]]): Inventory item per product name,
+            None if the product was not found
+
+    Returns:
+        InventoryResponse: The answer and the inventory ids it is based on
+    """
+    answers = []
+    sources = []
+    for product_name, inventory in inventory_by_name.items():
+        if inventory is None:
+            answers.append(f"{product_name}: not found in inventory")
+        elif inventory.id not in sources:
+            # Differently written names, e.g. "energy bars" and "Energy Bars", can resolve
+            # to the same item, which is only reported once
+            answers.append(f"{inventory.name}: {inventory.quantity_in_stock} units in stock")
+            sources.append(inventory.id)
+
+    return InventoryResponse(answer="; ".join(answers), source=", ".join(sources))
+
 
 class OpenAIClient:
     """
@@ -29,26 +296,61 @@ class OpenAIClient:
         Args:
             model (str): The OpenAI model to use
         """
-        self.api_key = os.getenv("OPENAI_API_KEY")
+        self.api_key = config.OPENAI_API_KEY
         if not self.api_key:
             logger.error("OpenAI API key not found in environment variables")
             raise ValueError(
                 "OpenAI API key not found. Please set the OPENAI_API_KEY environment variable."
             )
 
-        self.client = openai.OpenAI(api_key=self.api_key)
+        self.client = get_openai_client(self.api_key)
         self.model = model
         logger.info(f"OpenAI client initialized with model: {model}")
 
     def process_sales_query(
-        self, query: SalesQuery, sales_data_summary: Dict[str, Any]
+        self,
+        query: SalesQuery,
+        sales_data_summary_json: bytes,
+        on_products: Optional[Callable[[List[SalesAnalysisResponse.Product]], None]] = None,
+        sales_data_summary_digest: Optional[bytes] = None,
+    ) -> SalesAnalysisResponse:
+        """
+        Process a sales query using the OpenAI API with JSON schema response format.
+        Blocking wrapper around aprocess_sales_query.
+
+        Args:
+            query (SalesQuery): The sales query to process
+            sales_data_summary_json (bytes): Serialized summary of sales data to provide context
+            on_products (Optional[Callable]): Called once with the products as soon as they are known
+            sales_data_summary_digest (Optional[bytes]): Digest of the summary from sales_data_digest,
+                computed from the summary if not given
+
+        Returns:
+            SalesAnalysisResponse: The response to the query with structured data
+        """
+        return run_async(self.aprocess_sales_query(
+            query, sales_data_summary_json, on_products, sales_data_summary_digest
+        ))
+
+    async def aprocess_sales_query(
+        self,
+        query: SalesQuery,
+        sales_data_summary_json: bytes,
+        on_products: Optional[Callable[[List[SalesAnalysisResponse.Product]], None]] = None,
+        sales_data_summary_digest: Optional[bytes] = None,
     ) -> SalesAnalysisResponse:
         """
         Process a sales query using the OpenAI API with JSON schema response format.
+        The completion is streamed, and on_products is called (on the event loop) as soon
+        as the products have been generated, so follow-up work such as the inventory query
+        can start while the response text is still being generated.
 
         Args:
             query (SalesQuery): The sales query to process
-            sales_data_summary (Dict[str, Any]): Summary of sales data to provide context
+            sales_data_summary_json (bytes): Serialized summary of sales data to provide context
+            on_products (Optional[Callable]): Called once with the products as soon as they are known
+            sales_data_summary_digest (Optional[bytes]): Digest of the summary from sales_data_digest,
+                computed from the summary if not given
 
         Returns:
             SalesAnalysisResponse: The response to the query with structured data
@@ -56,74 +358,269 @@ class OpenAIClient:
         try:
             logger.info(f"Processing sales query: {query.query_text}")
 
+            if sales_data_summary_digest is None:
+                sales_data_summary_digest = sales_data_digest(sales_data_summary_json)
+
             # Create system message with context about the sales data
-            system_message = self._create_system_message(sales_data_summary)
+            system_message = self._create_system_message(sales_data_summary_json, sales_data_summary_digest)
+
+            # Return the cached response if this exact query was answered before for the same data
+            data_key = _data_cache_key(self.model, sales_data_summary_digest)
+            cache_key = _response_cache_key(data_key, query.query_text)
+            cached_response = _response_cache_get(cache_key)
+            if cached_response is not None:
+                logger.info("Sales query answered from response cache (hit)")
+                sales_response = _SALES_RESPONSE_ADAPTER.validate_json(cached_response)
+                if on_products is not None:
+                    on_products(sales_response.products)
+                return sales_response
+            logger.info("Sales query not in response cache (miss)")
+
+            # Otherwise reuse the response of a differently phrased but equivalent query. The
+            # lookup happens before the completion starts, so a hit costs no completion tokens,
+            # and the wait for the embedding is capped so a slow embedding barely delays a miss.
+            semantic_key = _semantic_cache_key(data_key, query.query_text)
+            embedding_task = asyncio.ensure_future(self._embed_query(query.query_text))
+            try:
+                query_embedding = await asyncio.wait_for(
+                    asyncio.shield(embedding_task), _SEMANTIC_LOOKUP_TIMEOUT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                logger.info("Query embedding not ready, skipping semantic cache lookup")
+                query_embedding = None
+            if query_embedding is not None:
+                cached_response = _SEMANTIC_CACHE.lookup(semantic_key, query_embedding)
+                if cached_response is not None:
+                    sales_response = _SALES_RESPONSE_ADAPTER.validate_json(cached_response)
+                    if _mentions_products(query.query_text, sales_response):
+                        logger.info("Sales query answered from semantic cache (hit)")
+                        _cache_put(_RESPONSE_CACHE, cache_key, (time.monotonic(), cached_response), _RESPONSE_CACHE_SIZE)
+                        if on_products is not None:
+                            on_products(sales_response.products)
+                        return sales_response
+                logger.info("Sales query not in semantic cache (miss)")
+
+            try:
+                sales_response = await self._stream_sales_response(system_message, query.query_text, on_products)
+            finally:
+                # A late embedding is still used to cache the response below, but never waited for
+                if (
+                    query_embedding is None
+                    and embedding_task.done()
+                    and not embedding_task.cancelled()
+                    and embedding_task.exception() is None
+                ):
+                    query_embedding = embedding_task.result()
+                embedding_task.cancel()
+
+            if config.SALES_DEBUG_DUMP:
+                logger.debug("Response {}", sales_response.response_text)
+            logger.debug("Response {}", sales_response.products)
+            logger.debug("Response {}", sales_response.time_period)
+
+            response_json = _SALES_RESPONSE_ADAPTER.dump_json(sales_response)
+            _cache_put(_RESPONSE_CACHE, cache_key, (time.monotonic(), response_json), _RESPONSE_CACHE_SIZE)
+            if query_embedding is not None:
+                _SEMANTIC_CACHE.add(semantic_key, query_embedding, response_json)
+
+            logger.info(f"Sales query processed successfully")
+
+            return sales_response
+
+        except Exception as e:
+            logger.error(f"Error processing sales query: {str(e)}")
+            raise
 
-            completion = self.client.beta.chat.completions.parse(
+    async def _stream_sales_response(
+        self,
+        system_message: str,
+        query_text: str,
+        on_products: Optional[Callable[[List[SalesAnalysisResponse.Product]], None]] = None,
+    ) -> SalesAnalysisResponse:
+        """
+        Stream the completion for a sales query.
+
+        Args:
+            system_message (str): The system message, including the sales data
+            query_text (str): The query text
+            on_products (Optional[Callable]): Called once with the products as soon as they are known
+
+        Returns:
+            SalesAnalysisResponse: The response to the query with structured data
+        """
+        products_reported = on_products is None
+        async with _API_SEMAPHORE:
+            async with self.client.beta.chat.completions.stream(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_message},
-                    {"role": "user", "content": query.query_text},
+                    {"role": "user", "content": query_text},
                 ],
                 response_format=SalesAnalysisResponse,
-                temperature=0.7,
-            )
+                temperature=0,
+                max_completion_tokens=_SALES_MAX_TOKENS,
+            ) as stream:
+                async for event in stream:
+                    # The products list is complete once the model has moved on to the
+                    # next field (time_period) in the partially parsed response
+                    if (
+                        not products_reported
+                        and event.type == "content.delta"
+                        and isinstance(event.parsed, dict)
+                        and "time_period" in event.parsed
+                    ):
+                        products_reported = True
+                        on_products([
+                            SalesAnalysisResponse.Product.model_validate(product)
+                            for product in event.parsed.get("products", [])
+                        ])
+                completion = await stream.get_final_completion()
+
+        sales_response = completion.choices[0].message.parsed
+        if not products_reported:
+            on_products(sales_response.products)
+        return sales_response
+
+    async def _embed_query(self, query_text: str) -> Optional[np.ndarray]:
+        """
+        Embed a query for the semantic cache.
+
+        Args:
+            query_text (str): The query text
 
-            sales_response = completion.choices[0].message.parsed
+        Returns:
+            Optional[np.ndarray]: The normalized query embedding, or None if embedding failed
+        """
+        try:
+            async with _API_SEMAPHORE:
+                embedding_response = await self.client.embeddings.create(
+                    model=_EMBEDDING_MODEL,
+                    input=query_text,
+                )
+        except openai.OpenAIError as e:
+            # The cache is an optimization, so answer the query without it
+            logger.warning(f"Error embedding sales query, skipping semantic cache: {str(e)}")
+            return None
+
+        embedding = np.asarray(embedding_response.data[0].embedding, dtype=np.float32)
+        return embedding / np.linalg.norm(embedding)
+
+    def process_sales_queries_batch(
+        self, queries: List[SalesQuery], sales_data_summary_json: bytes
+    ) -> List[SalesAnalysisResponse]:
+        """
+        Process several sales queries concurrently.
+        Blocking wrapper around aprocess_sales_queries_batch.
 
-            logger.debug(f"Response {sales_response.response_text}")
-            logger.debug(f"Response {sales_response.products}")
-            logger.debug(f"Response {sales_response.time_period}")
+        Args:
+            queries (List[SalesQuery]): The sales queries to process
+            sales_data_summary_json (bytes): Serialized summary of sales data to provide context
 
-            logger.info(f"Sales query processed successfully")
+        Returns:
+            List[SalesAnalysisResponse]: The responses, in the order of the queries
+        """
+        return run_async(self.aprocess_sales_queries_batch(queries, sales_data_summary_json))
 
-            return sales_response
+    async def aprocess_sales_queries_batch(
+        self, queries: List[SalesQuery], sales_data_summary_json: bytes
+    ) -> List[SalesAnalysisResponse]:
+        """
+        Process several sales queries concurrently, the number of requests in flight
+        is capped by the API semaphore.
 
-        except Exception as e:
-            logger.error(f"Error processing sales query: {str(e)}")
-            raise
+        Args:
+            queries (List[SalesQuery]): The sales queries to process
+            sales_data_summary_json (bytes): Serialized summary of sales data to provide context
+
+        Returns:
+            List[SalesAnalysisResponse]: The responses, in the order of the queries
+        """
+        # All queries share the summary, so compute its digest once
+        digest = sales_data_digest(sales_data_summary_json)
+        return await asyncio.gather(
+            *(self.aprocess_sales_query(query, sales_data_summary_json, sales_data_summary_digest=digest)
+              for query in queries)
+        )
+
+    def process_many(
+        self,
+        items: List[Tuple[SalesQuery, bytes]],
+        concurrency: int = _API_CONCURRENCY,
+    ) -> List[Union[Tuple[SalesAnalysisResponse, Optional[InventoryResponse]], BaseException]]:
+        """
+        Process several sales queries, each followed by its inventory query, concurrently.
+        Blocking wrapper around aprocess_many.
+
+        Args:
+            items (List[Tuple[SalesQuery, bytes]]): The sales queries with their serialized sales data summaries
+            concurrency (int): Maximum number of items processed at once
+
+        Returns:
+            List: Per item, the sales and inventory responses, or the exception it failed with
+        """
+        return run_async(self.aprocess_many(items, concurrency))
 
-    def _create_system_message(self, sales_data_summary: Dict[str, Any]) -> str:
+    async def aprocess_many(
+        self,
+        items: List[Tuple[SalesQuery, bytes]],
+        concurrency: int = _API_CONCURRENCY,
+    ) -> List[Union[Tuple[SalesAnalysisResponse, Optional[InventoryResponse]], BaseException]]:
+        """
+        Process several sales queries, each followed by its inventory query, concurrently.
+        A failing item does not cancel the others, its exception is returned in its place.
+        Rate limited requests are retried with exponential backoff by the OpenAI client.
+
+        Args:
+            items (List[Tuple[SalesQuery, bytes]]): The sales queries with their serialized sales data summaries
+            concurrency (int): Maximum number of items processed at once
+
+        Returns:
+            List: Per item, the sales and inventory responses, or the exception it failed with
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def process_one(
+            query: SalesQuery, sales_data_summary_json: bytes
+        ) -> Tuple[SalesAnalysisResponse, Optional[InventoryResponse]]:
+            async with semaphore:
+                sales_response = await self.aprocess_sales_query(query, sales_data_summary_json)
+                inventory_response = None
+                if sales_response.products:
+                    inventory_response = await self.aprocess_inventory_query(sales_response.products)
+                return sales_response, inventory_response
+
+        return await asyncio.gather(
+            *(process_one(query, sales_data_summary_json) for query, sales_data_summary_json in items),
+            return_exceptions=True,
+        )
+
+    def _create_system_message(self, sales_data_summary_json: bytes, sales_data_summary_digest: bytes) -> str:
         """
         Create a system message with context about the sales data.
 
         Args:
-            sales_data_summary (Dict[str, Any]): Summary of sales data
+            sales_data_summary_json (bytes): Serialized summary of sales data
+            sales_data_summary_digest (bytes): Digest of the summary, from sales_data_digest
 
         Returns:
             str: The system message
         """
-        # Convert sales data summary to JSON string
-        sales_data_json = json.dumps(sales_data_summary, default=str)
+        return _get_system_message(sales_data_summary_json, sales_data_summary_digest)
 
-        # Create system message
-        system_message = f"""
-        You are an AI assistant specialized in sales forecasting and analysis.
-        You have access to historical sales data for various food bar products.
-        
-        The available sales data includes:
-        {sales_data_json}
-        
-        When responding to queries:
-        1. Provide accurate information based on the available data.
-        2. If a forecast is requested, give a reasonable estimate based on historical trends.
-        3. Be clear about the limitations of your forecast.
-        4. Keep responses concise but informative.
-        5. If you don't know the answer or the data is insufficient, say so.
-        6. Carefully identify all products mentioned in the query.
-        7. Identify the time period mentioned in the query (e.g., next month, this quarter, next year).
-        
-        Your response will be in JSON format with these fields:
-        - products: An array of product names mentioned in the query
-        - time_period: The time period mentioned in the query
-        - forecast_text: Your natural language response to the query
-        
-        Now, analyze the user's query and provide the best response you can.
+    def process_inventory_query(self, products: List[str]) -> InventoryResponse:
         """
+        Process an inventory query using the OpenAI API.
+        Blocking wrapper around aprocess_inventory_query.
+
+        Args:
+            products (List[str]): The products to get inventory for
 
-        return system_message
+        Returns:
+            InventoryResponse: The response to the inventory query
+        """
+        return run_async(self.aprocess_inventory_query(products))
 
-    def process_inventory_query(self, products: List[str]) -> str:
+    async def aprocess_inventory_query(self, products: List[str]) -> InventoryResponse:
         """
         Process an inventory query using the OpenAI API.
 
@@ -131,37 +628,14 @@ class OpenAIClient:
             products (List[str]): The products to get inventory for
 
         Returns:
-            str: The response to the inventory query
-        """
-
-        tools = [
-            {
-                "name": "get_inventory",
-                "description": "Get the inventory of the product",
-                "type": "function",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "product_name": {
-                            "type": "string",
-                            "description": "The name of the product",
-                        }
-                    },
-                    "required": ["product_name"],
-                    "additionalProperties": False,
-                },
-                "strict": True,
-            }
-        ]
+            InventoryResponse: The response to the inventory query
+        """
 
         try:
             logger.info(f"Processing inventory query for products: {products}")
 
             messages = [
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant that can answer questions about the inventory of an FMCG company.",
-                },
+                _INVENTORY_SYSTEM_MESSAGE,
                 {
                     "role": "user",
                     "content": f"What is the inventory for the following products: {products}",
@@ -169,61 +643,89 @@ class OpenAIClient:
             ]
 
             # First completion to get the tool calls and find out if a tool call is needed.
-            inventory_completion = self.client.responses.create(
-                model=self.model,
-                input=messages,
-                tools=tools,
-                temperature=0.7
-            )
+            async with _API_SEMAPHORE:
+                inventory_completion = await self.client.responses.create(
+                    model=self.model,
+                    input=messages,
+                    tools=_INVENTORY_TOOLS,
+                    # Let the model request every product in this single completion
+                    parallel_tool_calls=True,
+                    temperature=0,
+                    max_output_tokens=_INVENTORY_MAX_TOKENS,
+                )
+
+            # Check which tool calls are for getting the inventory.
+            tool_calls = [
+                item for item in inventory_completion.output
+                if item.type == "function_call" and item.name == "get_inventory"
+            ]
 
-            logger.info(f"Inventory Completion: {inventory_completion}")
+            # The full completion object is large, so it is only logged when dumps are enabled
+            logger.debug(
+                "Inventory Completion {}: {} tool calls, usage {}",
+                inventory_completion.id, len(tool_calls), inventory_completion.usage
+            )
+            if config.SALES_DEBUG_DUMP:
+                logger.debug("Inventory Completion: {}", inventory_completion)
+            # Get the product name from the arguments of each tool call.
+            product_names = [
+                orjson.loads(tool_call.arguments).get("product_name") for tool_call in tool_calls
+            ]
 
+            # Get the inventory for each distinct product once, the model may ask for the same
+            # product more than once. All products are looked up in a single bulk call.
+            unique_names = list(dict.fromkeys(product_names))
+            inventory_by_name = inventory_service.get_inventory_bulk(unique_names)
+
+            # The tool output already holds everything the answer needs, so build the response
+            # locally instead of a second round trip to the model. Only fall back to the model
+            # when no inventory was found.
+            if any(inventory is not None for inventory in inventory_by_name.values()):
+                inventory_response = _build_inventory_response(inventory_by_name)
+                logger.info(f"Inventory response built from tool output: {inventory_response.answer}")
+                return inventory_response
+
+            # Send all tool call outputs back to the model in one batch, in the original tool call
+            # order. None of the products were found, so every output is null.
             messages.append(
                 {
                     "role": "assistant",
                     "content": inventory_completion.output_text,
                 }
             )
-
-            # Get the tool call output.
-            for tool_call in inventory_completion.output:
-                # Check if the tool call is for getting the inventory.
-                if tool_call.name == "get_inventory":
-                    # Get the arguments for the tool call.
-                    args = json.loads(tool_call.arguments)
-                    # Get the inventory for the product.
-                    inventory = inventory_service.get_inventory(
-                        args.get("product_name")
-                    )
-
-                    messages.append(tool_call)
-                    messages.append(
-                        {
-                            "type": "function_call_output",
-                            "call_id": tool_call.call_id,
-                            "output": json.dumps(inventory.model_dump()) if inventory else "",
-                        }
-                    )
+            for tool_call in tool_calls:
+                messages.append(tool_call)
+                messages.append(
+                    {
+                        "type": "function_call_output",
+                        "call_id": tool_call.call_id,
+                        "output": "null",
+                    }
+                )
 
             # Second completion to get the final response, send the tool call output to the model.
-            completion_2 = self.client.responses.create(
-                model=self.model,
-                input=messages,
-                tools=tools,
-                text=InventoryResponseSchema.inventory_response_json_schema # This is the JSON schema for the response.
-            )
-
-            logger.info(f"Inventory Completion 2: {completion_2.output_text}")
+            async with _API_SEMAPHORE:
+                completion_2 = await self.client.responses.create(
+                    model=self.model,
+                    input=messages,
+                    tools=_INVENTORY_TOOLS,
+                    text=InventoryResponseSchema.inventory_response_json_schema, # This is the JSON schema for the response.
+                    temperature=0,
+                    max_output_tokens=_INVENTORY_MAX_TOKENS,
+                )
+
+            logger.debug("Inventory Completion 2 {}: usage {}", completion_2.id, completion_2.usage)
+            if config.SALES_DEBUG_DUMP:
+                logger.debug("Inventory Completion 2: {}", completion_2.output_text)
 
             # --------------------------------------------------------------
             # Step 5: Check model response
             # --------------------------------------------------------------
 
             # Validate the response using the JSON schema. (this is the response from the model)
-            inventory_response: InventoryResponse = InventoryResponse.model_validate(from_json(completion_2.output_text))
+            inventory_response: InventoryResponse = _INVENTORY_DECODER.decode(completion_2.output_text).to_model()
             return inventory_response
 
         except Exception as e:
-            logger.error(f"Error processing inventory query: {str(e)}")
-            logger.error(traceback.print_tb(e.__traceback__))
+            logger.exception(f"Error processing inventory query: {str(e)}")
             raise
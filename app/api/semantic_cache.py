@@ -0,0 +1,73 @@
+import numpy as np
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+class SemanticCache:
+    """
+    In-process cache of responses for near-duplicate queries, matched by cosine
+    similarity of the query embeddings. Entries are partitioned by a key, such as one
+    for the model and sales data, so a response is never reused for different data.
+    """
+    def __init__(self, threshold: float = 0.95, max_entries: int = 256, max_partitions: int = 8):
+        """
+        Initialize the semantic cache.
+        
+        Args:
+            threshold (float): Minimum cosine similarity for a cache hit
+            max_entries (int): Maximum number of entries per partition
+            max_partitions (int): Maximum number of partitions kept
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_partitions = max_partitions
+        self._partitions: "OrderedDict[bytes, Tuple[np.ndarray, List[bytes]]]" = OrderedDict()
+        
+    def lookup(self, partition: bytes, embedding: np.ndarray) -> Optional[bytes]:
+        """
+        Find the cached response of the most similar earlier query.
+        
+        Args:
+            partition (bytes): Key for the model and sales data
+            embedding (np.ndarray): Normalized embedding of the query
+            
+        Returns:
+            Optional[bytes]: The cached response JSON, or None if no query is similar enough
+        """
+        entry = self._partitions.get(partition)
+        if entry is None:
+            return None
+        
+        matrix, responses = entry
+        # Embeddings are normalized, so the dot product is the cosine similarity
+        similarities = matrix @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        
+        logger.debug("Semantic cache hit with similarity {:.3f}", similarities[best])
+        self._partitions.move_to_end(partition)
+        return responses[best]
+    
+    def add(self, partition: bytes, embedding: np.ndarray, response_json: bytes) -> None:
+        """
+        Add a query embedding and its response to the cache.
+        
+        Args:
+            partition (bytes): Key for the model and sales data
+            embedding (np.ndarray): Normalized embedding of the query
+            response_json (bytes): The response JSON
+        """
+        matrix, responses = self._partitions.get(
+            partition, (np.empty((0, embedding.shape[0]), dtype=np.float32), [])
+        )
+        # Keep only the most recent entries per partition
+        matrix = np.vstack([matrix, embedding])[-self.max_entries:]
+        responses = (responses + [response_json])[-self.max_entries:]
+        
+        self._partitions[partition] = (matrix, responses)
+        self._partitions.move_to_end(partition)
+        if len(self._partitions) > self.max_partitions:
+            self._partitions.popitem(last=False)
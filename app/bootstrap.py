@@ -0,0 +1,93 @@
+import os
+import threading
+import streamlit as st
+from typing import Optional, Tuple
+from app.utils.logger import get_logger
+from app.utils.async_runner import submit_async
+from app.api.openai_client import OpenAIClient, sales_data_digest
+from app.api.assistant_client import AssistantClient
+from app.data.sales_data_service import load_sales_data_summary_json
+
+# Initialize logger
+logger = get_logger()
+
+# API clients created by warm_clients, shared by all sessions
+_clients: Optional[Tuple[OpenAIClient, AssistantClient]] = None
+_clients_lock = threading.Lock()
+
+def warm_clients():
+    """
+    Create the API clients and start opening a connection to the OpenAI API, so the
+    first query skips the TCP and TLS handshake. Meant to run in a background thread
+    while the sales data is loaded. Returns once the clients exist, without waiting
+    for the connection.
+    """
+    global _clients
+    with _clients_lock:
+        if _clients is not None:
+            return
+        try:
+            _clients = (OpenAIClient(), AssistantClient())
+        except Exception as e:
+            # initialize_clients creates them again and reports the error in the UI
+            logger.warning(f"Could not preload API clients: {str(e)}")
+            return
+    
+    # models.list() returns a paginator, not a coroutine, so await it in one
+    async def list_models(client: OpenAIClient):
+        try:
+            await client.client.models.list()
+            logger.info("OpenAI connection warmed up")
+        except Exception as e:
+            # The warm-up is an optimization, the first query opens the connection otherwise
+            logger.warning(f"Could not warm up OpenAI connection: {str(e)}")
+    
+    # Only creating the clients is waited for, the connection is opened in the background
+    submit_async(list_models(_clients[0]))
+
+def initialize_clients():
+    """
+    Initialize API clients only once and store them in session state.
+    """
+    openai_client, assistant_client = _clients or (None, None)
+    
+    # Initialize OpenAI client if not already created
+    if "openai_client" not in st.session_state:
+        st.session_state.openai_client = openai_client or OpenAIClient()
+    
+    # Initialize Assistant client if not already created
+    if "assistant_client" not in st.session_state:
+        st.session_state.assistant_client = assistant_client or AssistantClient()
+
+@st.cache_resource(show_spinner=False)
+def _load_and_summarize(data_path: str, mtime_ns: int, size: int) -> Tuple[bytes, bytes]:
+    """
+    Load and summarize the sales data, shared by all sessions of this process.
+    The modification time and size are part of the cache key, so a changed file is reloaded.
+
+    Args:
+        data_path (str): Path to the sales data CSV
+        mtime_ns (int): Modification time of the file
+        size (int): Size of the file
+
+    Returns:
+        Tuple[bytes, bytes]: The sales data summary serialized as JSON, and its digest
+    """
+    # The summary is serialized once when it is built, the prompts only use the JSON.
+    # Its digest keys the per-query caches, so it is computed here once as well.
+    sales_data_summary_json = load_sales_data_summary_json(data_path)
+    return sales_data_summary_json, sales_data_digest(sales_data_summary_json)
+
+def load_sales_data_and_summary():
+    if "sales_data_summary_digest" not in st.session_state:
+        # Get the absolute path to the script
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        # Navigate to the data directory inside the app folder
+        data_path = os.path.join(script_dir, "data", "sales_data.csv")
+        stat = os.stat(data_path)
+        
+        # Load the data summary using the absolute path
+        st.session_state.sales_data_summary_json, st.session_state.sales_data_summary_digest = _load_and_summarize(
+            data_path, stat.st_mtime_ns, stat.st_size
+        )
+        logger.info("Sales data summary stored in session state")
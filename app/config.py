@@ -0,0 +1,14 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables once for the whole application
+load_dotenv()
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_ASSISTANT_ID = os.getenv("OPENAI_ASSISTANT_ID")
+
+# Log the full sales data summary and API responses when set to 1, otherwise only their sizes and ids are logged
+SALES_DEBUG_DUMP = os.getenv("SALES_DEBUG_DUMP") == "1"
+
+# Directory for the sales data summary cache, owned by the application
+SUMMARY_CACHE_DIR = os.getenv("SUMMARY_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
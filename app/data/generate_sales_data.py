@@ -1,14 +1,26 @@
 import pandas as pd
 import numpy as np
-import random
-from datetime import datetime, timedelta
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+# Column types of the generated CSV
+CSV_SCHEMA = pa.schema([
+    ('Date', pa.date32()),
+    ('Product', pa.string()),
+    ('Sales_Units', pa.int64()),
+    ('Revenue', pa.int64())
+])
+
+# Write values without quotes, like the committed sales_data.csv. pyarrow quotes the header
+# regardless of the quoting style, so the header is written separately.
+CSV_WRITE_OPTIONS = pacsv.WriteOptions(include_header=False, quoting_style="none")
 
 def generate_sales_data():
-    # Set seed for reproducibility
-    np.random.seed(42)
+    # Seeded random generator for reproducibility
+    rng = np.random.default_rng(42)
     
-    # Define products
-    products = ['Nut & Seed Bars', 'Raw & Fruit Bars', 'Energy Bars']
+    # Define products (alphabetically, so rows come out sorted by Date and Product)
+    products = sorted(['Nut & Seed Bars', 'Raw & Fruit Bars', 'Energy Bars'])
     
     # Base prices per unit for each product
     base_prices = {
@@ -33,48 +45,44 @@ def generate_sales_data():
     }
     
     # Create date range for 52 weeks (starting from Jan 1, 2024)
-    start_date = datetime(2024, 1, 1)
-    dates = [start_date + timedelta(days=i*7) for i in range(52)]
+    dates = pd.date_range("2024-01-01", periods=52, freq="7D")
+    
+    # Determine quarter (0-based) of each week
+    quarters = dates.quarter.to_numpy() - 1
+    
+    # Create a linear growth trend (annual growth)
+    growth_trend = np.linspace(1.0, 1.15, len(dates))  # 15% growth over the year
+    
+    # Lay out the per-product values as (products, weeks) matrices, so sales and
+    # revenue are computed for all products and weeks at once
+    base = np.array([base_sales[product] for product in products])[:, None]
+    seasonal = np.array([seasonal_factors[product] for product in products])[:, quarters]
+    prices = np.array([base_prices[product] for product in products])[:, None]
     
-    # Prepare data lists
-    data = []
+    # Add some randomness (±10%)
+    randomness = rng.uniform(0.9, 1.1, size=(len(products), len(dates)))
     
-    # Generate sales data with trends
-    for product in products:
-        # Create a linear growth trend (annual growth)
-        growth_trend = np.linspace(1.0, 1.15, 52)  # 15% growth over the year
-        
-        for i, date in enumerate(dates):
-            # Determine quarter (0-based)
-            quarter = (date.month - 1) // 3
-            
-            # Calculate base sales with seasonal adjustment and growth trend
-            base = base_sales[product]
-            seasonal = seasonal_factors[product][quarter]
-            trend = growth_trend[i]
-            
-            # Add some randomness (±10%)
-            randomness = random.uniform(0.9, 1.1)
-            
-            # Calculate final sales units
-            sales_units = int(base * seasonal * trend * randomness)
-            
-            # Calculate revenue with small random price variation
-            price_variation = random.uniform(0.98, 1.02)
-            unit_price = base_prices[product] * price_variation
-            revenue = int(sales_units * unit_price)
-            
-            # Add to data
-            data.append([date.strftime('%Y-%m-%d'), product, sales_units, revenue])
+    # Calculate final sales units with seasonal adjustment and growth trend
+    sales_units = (base * seasonal * growth_trend * randomness).astype(np.int64)
     
-    # Create DataFrame
-    df = pd.DataFrame(data, columns=['Date', 'Product', 'Sales_Units', 'Revenue'])
+    # Calculate revenue with small random price variation
+    price_variation = rng.uniform(0.98, 1.02, size=(len(products), len(dates)))
+    revenue = (sales_units * prices * price_variation).astype(np.int64)
     
-    # Sort by date
-    df = df.sort_values(['Date', 'Product'])
+    # Create DataFrame, one row per week and product, already sorted by date
+    df = pd.DataFrame({
+        'Date': np.repeat(dates.to_numpy(), len(products)),
+        'Product': np.tile(products, len(dates)),
+        'Sales_Units': sales_units.T.ravel(),
+        'Revenue': revenue.T.ravel()
+    })
     
-    # Save to CSV
-    df.to_csv('sales_data.csv', index=False)
+    # Save to CSV, pyarrow serializes the columns in C instead of row by row.
+    # Dates are written as plain dates (YYYY-MM-DD) rather than timestamps.
+    table = pa.Table.from_pandas(df, schema=CSV_SCHEMA, preserve_index=False)
+    with open('sales_data.csv', 'wb') as f:
+        f.write((",".join(CSV_SCHEMA.names) + "\n").encode())
+        pacsv.write_csv(table, f, write_options=CSV_WRITE_OPTIONS)
     print(f"Generated sales data with {len(df)} records for {len(products)} products over {len(dates)} weeks")
     
     return df
@@ -1,11 +1,13 @@
-import json
-from typing import Dict, List, Optional
+import msgspec
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from app.utils.logger import get_logger
 from pydantic import BaseModel
 
 logger = get_logger()
-with open("app/data/inventory/stock-data.json", "r") as f:
-    inventory = json.load(f)
+
+STOCK_DATA_PATH = Path("app/data/inventory/stock-data.json")
 
 
 class InventoryItem(BaseModel):
@@ -17,6 +19,71 @@ class InventoryItem(BaseModel):
     quantity_in_stock: int
 
 
+class InventoryItemStruct(msgspec.Struct):
+    """
+    msgspec struct for the fields of an inventory item in the stock data file.
+    Other fields in the file are skipped while decoding.
+    """
+    id: str
+    name: str
+    quantity_in_stock: int
+
+
+class InventoryFile(msgspec.Struct):
+    """
+    msgspec struct for the stock data file.
+    """
+    inventory_items: List[InventoryItemStruct] = []
+
+
+@lru_cache(maxsize=1)
+def _load_inventory_index() -> Tuple[Dict[str, InventoryItem], Dict[str, InventoryItem]]:
+    """
+    Load the stock data file on first use and index the inventory items by product name,
+    so lookups are a dict access and the Pydantic models are only built once.
+    
+    Returns:
+        Tuple of the items by exact name and by case-insensitive name
+    """
+    stock_data = msgspec.json.decode(STOCK_DATA_PATH.read_bytes(), type=InventoryFile)
+    
+    # The first item wins if a name occurs more than once
+    by_name: Dict[str, InventoryItem] = {}
+    for item in stock_data.inventory_items:
+        by_name.setdefault(item.name, InventoryItem.model_construct(
+            id=item.id,
+            name=item.name,
+            quantity_in_stock=item.quantity_in_stock
+        ))
+    
+    # Case-insensitive aliases, to absorb casing differences in product names from the model
+    by_casefold_name: Dict[str, InventoryItem] = {}
+    for name, inventory_item in by_name.items():
+        by_casefold_name.setdefault(name.casefold(), inventory_item)
+    
+    logger.info(f"Loaded {len(by_name)} inventory items from {STOCK_DATA_PATH}")
+    return by_name, by_casefold_name
+
+
+def _find_inventory_item(product_name: str) -> Optional[InventoryItem]:
+    """
+    Look up an inventory item by exact product name, falling back to a case-insensitive match.
+    
+    Args:
+        product_name: Name of the product to find
+        
+    Returns:
+        InventoryItem model or None if product not found
+    """
+    if not product_name:
+        return None
+    by_name, by_casefold_name = _load_inventory_index()
+    inventory_item = by_name.get(product_name)
+    if inventory_item is None:
+        inventory_item = by_casefold_name.get(product_name.casefold())
+    return inventory_item
+
+
 def get_inventory(product_name: str) -> Optional[InventoryItem]:
     """
     Find an inventory item by product name and return a Pydantic model
@@ -30,17 +97,31 @@ def get_inventory(product_name: str) -> Optional[InventoryItem]:
     """
     logger.info(f"Getting inventory for product: {product_name}")
     
-    # Search for the product in inventory_items list
-    for item in inventory.get("inventory_items", []):
-        if item.get("name") == product_name:
-            # Create and return Pydantic model with requested fields
-            return InventoryItem(
-                id=item.get("id"),
-                name=item.get("name"),
-                quantity_in_stock=item.get("quantity_in_stock")
-            )
+    inventory_item = _find_inventory_item(product_name)
     
     # If product not found
-    logger.warning(f"Product not found: {product_name}")
-    return None
+    if inventory_item is None:
+        logger.warning(f"Product not found: {product_name}")
+    return inventory_item
 
+
+def get_inventory_bulk(product_names: List[str]) -> Dict[str, Optional[InventoryItem]]:
+    """
+    Find the inventory items for several products at once.
+    
+    Args:
+        product_names: Names of the products to find
+        
+    Returns:
+        Dict mapping each product name to its InventoryItem model, or None if not found
+    """
+    logger.info(f"Getting inventory for products: {product_names}")
+    
+    results = {product_name: _find_inventory_item(product_name) for product_name in product_names}
+    
+    # Log the products that were not found
+    for product_name, inventory_item in results.items():
+        if inventory_item is None:
+            logger.warning(f"Product not found: {product_name}")
+    
+    return results
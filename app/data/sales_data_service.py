@@ -1,10 +1,18 @@
+import os
+import hashlib
 import pandas as pd
-import json
+import orjson
+from app import config
 from app.utils.logger import get_logger
+from app.utils.data_loader import load_sales_data
 
 # Initialize logger
 logger = get_logger()
 
+# Summaries are cached on disk as JSON, keyed by this version and the path, modification
+# time and size of the CSV. Bump the version when the summary or the data loader changes.
+_SUMMARY_CACHE_VERSION = 1
+
 def generate_sales_data_summary(sales_data: pd.DataFrame) -> dict:
     """
     Generate a summary of the sales data to provide context to the OpenAI model.
@@ -21,57 +29,112 @@ def generate_sales_data_summary(sales_data: pd.DataFrame) -> dict:
                 "start_date": sales_data['Date'].min().strftime('%Y-%m-%d'),
                 "end_date": sales_data['Date'].max().strftime('%Y-%m-%d')
             },
-            "products": sales_data['Product'].unique().tolist(),
+            "products": sales_data['Product'].cat.categories.tolist(),
             "total_records": len(sales_data),
             "product_statistics": {}
         }
         
-        # Add statistics for each product
-        for product in summary["products"]:
-            product_data = sales_data[sales_data['Product'] == product]
+        # Add statistics for each product, aggregated in a single groupby
+        product_statistics = sales_data.groupby('Product', observed=True).agg(
+            total_sales_units=('Sales_Units', 'sum'),
+            total_revenue=('Revenue', 'sum'),
+            average_sales_units_per_week=('Sales_Units', 'mean'),
+            average_revenue_per_week=('Revenue', 'mean'),
+            average_price_per_unit=('Price_Per_Unit', 'mean')
+        )
+        for product, stats in product_statistics.to_dict('index').items():
             summary["product_statistics"][product] = {
-                "total_sales_units": int(product_data['Sales_Units'].sum()),
-                "total_revenue": float(product_data['Revenue'].sum()),
-                "average_sales_units_per_week": float(product_data['Sales_Units'].mean()),
-                "average_revenue_per_week": float(product_data['Revenue'].mean()),
-                "average_price_per_unit": float(product_data['Price_Per_Unit'].mean())
+                "total_sales_units": int(stats['total_sales_units']),
+                "total_revenue": float(stats['total_revenue']),
+                "average_sales_units_per_week": float(stats['average_sales_units_per_week']),
+                "average_revenue_per_week": float(stats['average_revenue_per_week']),
+                "average_price_per_unit": float(stats['average_price_per_unit'])
             }
         
-        # Add monthly trends
-        monthly_sales = sales_data.groupby(['Year', 'Month', 'Product'])['Sales_Units'].sum().reset_index()
+        # Add monthly trends, the groupby only yields the (year, month, product) groups that have data
+        monthly_sales = sales_data.groupby(['Year', 'Month', 'Product'], observed=True)['Sales_Units'].sum()
         summary["monthly_trends"] = {}
         
-        for year in monthly_sales['Year'].unique():
-            summary["monthly_trends"][int(year)] = {}
-            for month in range(1, 13):
-                month_data = monthly_sales[(monthly_sales['Year'] == year) & (monthly_sales['Month'] == month)]
-                if not month_data.empty:
-                    summary["monthly_trends"][int(year)][int(month)] = {}
-                    for product in summary["products"]:
-                        product_month_data = month_data[month_data['Product'] == product]
-                        if not product_month_data.empty:
-                            summary["monthly_trends"][int(year)][int(month)][product] = int(product_month_data['Sales_Units'].values[0])
+        for (year, month, product), sales_units in monthly_sales.items():
+            summary["monthly_trends"].setdefault(int(year), {}).setdefault(int(month), {})[product] = int(sales_units)
         
-        # Add quarterly trends
-        quarterly_sales = sales_data.groupby(['Year', 'Quarter', 'Product'])['Sales_Units'].sum().reset_index()
+        # Add quarterly trends, rolled up from the monthly sums instead of scanning the sales data again
+        years, months, products = (monthly_sales.index.get_level_values(level) for level in range(3))
+        quarterly_sales = monthly_sales.groupby([years, (months - 1) // 3 + 1, products], observed=True).sum()
         summary["quarterly_trends"] = {}
         
-        for year in quarterly_sales['Year'].unique():
-            summary["quarterly_trends"][int(year)] = {}
-            for quarter in range(1, 5):
-                quarter_data = quarterly_sales[(quarterly_sales['Year'] == year) & (quarterly_sales['Quarter'] == quarter)]
-                if not quarter_data.empty:
-                    summary["quarterly_trends"][int(year)][int(quarter)] = {}
-                    for product in summary["products"]:
-                        product_quarter_data = quarter_data[quarter_data['Product'] == product]
-                        if not product_quarter_data.empty:
-                            summary["quarterly_trends"][int(year)][int(quarter)][product] = int(product_quarter_data['Sales_Units'].values[0])
+        for (year, quarter, product), sales_units in quarterly_sales.items():
+            summary["quarterly_trends"].setdefault(int(year), {}).setdefault(int(quarter), {})[product] = int(sales_units)
         
         logger.info("Sales data summary generated successfully")
-        logger.debug(f"Sales data summary: {json.dumps(summary, indent=2)}")
+        logger.debug("Sales data summary: {} products, {} records", len(summary["products"]), summary["total_records"])
+        if config.SALES_DEBUG_DUMP:
+            logger.debug("Sales data summary: {}", orjson.dumps(summary, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode())
 
         return summary
         
     except Exception as e:
         logger.error(f"Error generating sales data summary: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+def serialize_sales_data_summary(summary: dict) -> bytes:
+    """
+    Serialize a sales data summary to JSON once, when the data is loaded, so it can be
+    spliced into every prompt without serializing it per query.
+    
+    Args:
+        summary (dict): Summary of the sales data
+        
+    Returns:
+        bytes: The summary as JSON
+    """
+    # orjson handles the integer year/month keys and numpy scalars natively. Keys are not
+    # sorted: the summary is built in a fixed order, and sorting would order the integer
+    # month keys as strings ("1", "10", "11", "12", "2", ...).
+    return orjson.dumps(
+        summary,
+        default=str,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+def load_sales_data_summary_json(file_path: str) -> bytes:
+    """
+    Load the sales data from a CSV file and summarize it as JSON. Summaries are cached on
+    disk, so a new process only reads the CSV again when it has changed.
+    
+    Args:
+        file_path (str): Path to the CSV file
+        
+    Returns:
+        bytes: Summary of the sales data, serialized as JSON
+    """
+    stat = os.stat(file_path)
+    key = hashlib.blake2b(
+        f"{_SUMMARY_CACHE_VERSION}:{os.path.abspath(file_path)}:{stat.st_mtime_ns}:{stat.st_size}".encode(),
+        digest_size=16
+    ).hexdigest()
+    cache_path = os.path.join(config.SUMMARY_CACHE_DIR, f"sales_summary_{key}.json")
+    
+    try:
+        with open(cache_path, 'rb') as f:
+            summary_json = f.read()
+        # Check that the cached file is complete JSON before using it
+        orjson.loads(summary_json)
+        logger.info(f"Sales data summary loaded from cache {cache_path}")
+        return summary_json
+    except (OSError, orjson.JSONDecodeError):
+        pass
+    
+    summary_json = serialize_sales_data_summary(generate_sales_data_summary(load_sales_data(file_path)))
+    
+    # Write to a temporary file first, so concurrent readers never see a partial cache file
+    try:
+        os.makedirs(config.SUMMARY_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(summary_json)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not cache sales data summary: {str(e)}")
+    
+    return summary_json
@@ -1,36 +1,42 @@
-import os
-import pandas as pd
-from dotenv import load_dotenv
+import queue
+import asyncio
+import threading
 import streamlit as st
-import json
+from typing import Callable, List, Optional, Tuple
 from app.utils.logger import get_logger
-from app.utils.data_loader import load_sales_data
-from app.api.openai_client import OpenAIClient
+from app.utils.async_runner import run_async, submit_async
 from ui.chat_interface import (
     initialize_chat_interface,
     add_user_message, 
     add_assistant_message
 )
 from models.schema import InventoryResponse, SalesQuery, SalesAnalysisResponse, AugmentedResponse
-from app.data.sales_data_service import generate_sales_data_summary
 from app.api.assistant_client import AssistantClient
-
-# Load environment variables
-load_dotenv()
+from app.bootstrap import initialize_clients, load_sales_data_and_summary, warm_clients
+from app.ui.format import format_augmented_response
 
 # Initialize logger
 logger = get_logger()
 
-
 def main():
     """
     Main function for the Streamlit application.
     """
+    # Inventory queries started for the current question, cancelled if answering it fails
+    inventory_tasks = []
     try:
+        # Create the API clients in the background while the sales data is loaded
+        preload_thread = None
+        if "openai_client" not in st.session_state:
+            preload_thread = threading.Thread(target=warm_clients, name="client-preload", daemon=True)
+            preload_thread.start()
+
         # Load sales data and generate summary only once at startup
         load_sales_data_and_summary()
-        
+
         # Initialize openAI clients only once and store in session state
+        if preload_thread is not None:
+            preload_thread.join()
         initialize_clients()
         
         # Initialize Streamlit chat interface
@@ -44,186 +50,124 @@ def main():
             # Create sales query
             sales_query = SalesQuery(query_text=user_input)
             
+            openai_client = st.session_state.openai_client
+            assistant_client = st.session_state.assistant_client
+            
+            # Start the inventory query as soon as the products are known, while the
+            # historical analysis text is still being generated
+            def start_inventory_query(products):
+                if products:
+                    inventory_tasks.append(asyncio.ensure_future(openai_client.aprocess_inventory_query(products)))
+            
             # Process query with OpenAI (Stage 1: Historical Analysis)
             with st.spinner("Analyzing historical data..."):
-                sales_response =  st.session_state.openai_client.process_sales_query(sales_query, st.session_state.sales_data_summary)
+                sales_response = run_async(openai_client.aprocess_sales_query(
+                    sales_query,
+                    st.session_state.sales_data_summary_json,
+                    on_products=start_inventory_query,
+                    sales_data_summary_digest=st.session_state.sales_data_summary_digest
+                ))
                 # Create a temporary container to show intermediate result
                 historical_analysis_container = st.empty()
                 historical_analysis_container.markdown(f"💡 **Historical Analysis:**\n{sales_response.response_text}")
             
             # Check if we have products and time period in the structured data
             has_product = len(sales_response.products) > 0
-            if has_product:
-                inventory_response = st.session_state.openai_client.process_inventory_query(sales_response.products)
+            has_time_period = sales_response.time_period != "unknown"
+            # Only proceed with augmentation if we have identified products and time period
+            should_augment = has_product and has_time_period
+            
+            # Market augmentation (Stage 2) runs concurrently with the inventory query,
+            # which is already underway
+            inventory_task = inventory_tasks[0] if inventory_tasks else None
+            with st.spinner("Gathering market insights..."):
+                # Show the market insights as they are generated. The text deltas arrive on
+                # the event loop thread and are handed over to this thread through a queue.
+                insight_deltas = queue.SimpleQueue()
+                insights_future = submit_async(gather_inventory_and_insights(
+                    assistant_client, sales_response, inventory_task, should_augment, on_delta=insight_deltas.put
+                ))
+                insights_future.add_done_callback(lambda _: insight_deltas.put(None))
+                
+                insights_container = st.empty()
+                insights_text = ""
+                for delta in iter(insight_deltas.get, None):
+                    insights_text += delta
+                    insights_container.code(insights_text, language="json")
+                
+                inventory_response, augmented_response = insights_future.result()
+                insights_container.empty()
+            
+            if inventory_response is not None:
                 # Create another temporary container for inventory result
                 inventory_container = st.empty()
                 inventory_container.markdown(f"📦 **Current Inventory:**\n{inventory_response.answer}")
-            else:
-                inventory_response = None
 
-            has_time_period = sales_response.time_period != "unknown"
-            # Only proceed with augmentation if we have identified products and time period
-            if has_product and has_time_period:
-                # Process with Assistant (Stage 2: Market Context Augmentation)
-                with st.spinner("Gathering market insights..."):
-                    augmented_response:AugmentedResponse = st.session_state.assistant_client.augment_sales_response(sales_response)
-                
+            # Clear the temporary results before showing the final response
+            historical_analysis_container.empty()
+            if inventory_response is not None:
+                inventory_container.empty()
+
+            # The new messages are drawn below the chat history as they are added, so the
+            # script does not need to be rerun to show them
+            if should_augment:
                 # Format the combined response for display
                 historical_and_insights_response = format_augmented_response(augmented_response)
-                
-                # Clear the temporary result before showing final response
-                historical_analysis_container.empty()
-                inventory_container.empty()
 
-                add_assistant_message(inventory_response.answer + " (Inventory ID: " + inventory_response.source + ")")
+                if inventory_response is not None:
+                    add_assistant_message(inventory_response.answer + " (Inventory ID: " + inventory_response.source + ")")
                 add_assistant_message(historical_and_insights_response)
             else:
                 # Just use the historical analysis if we couldn't identify product/time period
                 add_assistant_message(sales_response.response_text)
-            
-            st.rerun()
     
     except Exception as e:
         logger.error(f"Error in main function: {str(e)}")
         st.error(f"An error occurred: {str(e)}")
+        # Do not leave an inventory query running for a question that failed
+        if inventory_tasks:
+            run_async(cancel_tasks(inventory_tasks))
 
-def initialize_clients():
-    """
-    Initialize API clients only once and store them in session state.
+async def cancel_tasks(tasks: List["asyncio.Future"]):
     """
-    # Initialize OpenAI client if not already created
-    if "openai_client" not in st.session_state:
-        st.session_state.openai_client = OpenAIClient()
+    Cancel tasks running on the event loop. Tasks that have finished are left as they are.
     
-    # Initialize Assistant client if not already created
-    if "assistant_client" not in st.session_state:
-        st.session_state.assistant_client = AssistantClient()
-
-def load_sales_data_and_summary():
-    if "sales_data" not in st.session_state:
-        # Get the absolute path to the script
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        # Navigate to the data directory inside the app folder
-        data_path = os.path.join(script_dir, "data", "sales_data.csv")
-        # Load the data using the absolute path
-        st.session_state.sales_data = load_sales_data(data_path)
-        logger.info("Sales data loaded successfully")
-            
-        # Generate sales data summary
-        st.session_state.sales_data_summary = generate_sales_data_summary(st.session_state.sales_data)
-        logger.info("Sales data summary generated and stored in session state")
-
-def format_augmented_response(augmented_response: AugmentedResponse) -> str:
+    Args:
+        tasks (List[asyncio.Future]): The tasks to cancel
     """
-    Format an augmented response for display using Markdown for better Streamlit presentation.
+    for task in tasks:
+        task.cancel()
+
+async def gather_inventory_and_insights(
+    assistant_client: AssistantClient,
+    sales_response: SalesAnalysisResponse,
+    inventory_task: Optional["asyncio.Future[InventoryResponse]"],
+    should_augment: bool,
+    on_delta: Optional[Callable[[str], None]] = None
+) -> Tuple[Optional[InventoryResponse], Optional[AugmentedResponse]]:
+    """
+    Wait for the inventory query and fetch the market insights for a sales response concurrently.
     
     Args:
-        augmented_response (AugmentedResponse): The augmented response
+        assistant_client (AssistantClient): The Assistant client
+        sales_response (SalesAnalysisResponse): The historical analysis response
+        inventory_task (Optional[asyncio.Future]): The running inventory query, None if there is none
+        should_augment (bool): Whether to augment the response with market insights
+        on_delta (Optional[Callable]): Called with the market insights text as it is generated
         
     Returns:
-        str: The formatted response in Markdown format
-    """
-    # Get the initial response
-    initial_response = augmented_response.initial_response.response_text
-    
-    # Get the market insights
-    market_insights = augmented_response.market_insights
-    
-    # Format market trends with proper Markdown
-    market_trends = []
-    for market_trend in market_insights.market_trends:
-        trend_name = market_trend.trend
-        impact = market_trend.impact
-        description = market_trend.description
-        
-        # Format impact with color indicators using Markdown
-        impact_formatted = f"**{impact}**"
-        if impact == "Positive":
-            impact_formatted = f"**:green[{impact}]**"
-        elif impact == "Negative":
-            impact_formatted = f"**:red[{impact}]**"
-        elif impact == "Neutral":
-            impact_formatted = f"**:blue[{impact}]**"
-        
-        if trend_name:
-            market_trends.append(f"* **{trend_name}** ({impact_formatted}): {description}")
-        else:
-            market_trends.append(f"* {description}")
-    
-    # Format competitive landscape with proper Markdown
-    competitive_landscape = []
-    for comp in market_insights.competitive_landscape:
-        competitor = comp.competitor
-        action = comp.action
-        impact = comp.impact
-        description = comp.description
-        
-        # Format impact with color indicators using Markdown
-        impact_formatted = f"**{impact}**"
-        if impact == "Positive":
-            impact_formatted = f"**:green[{impact}]**"
-        elif impact == "Negative":
-            impact_formatted = f"**:red[{impact}]**"
-        elif impact == "Neutral":
-            impact_formatted = f"**:blue[{impact}]**"
-        
-        if competitor:
-            competitive_landscape.append(f"* **{competitor}** - {action} ({impact_formatted}): {description}")
-        else:
-            competitive_landscape.append(f"* {description}")
-    
-    # Format regulatory considerations with proper Markdown
-    regulatory_considerations = []
-    for reg in market_insights.regulatory_considerations:
-        regulation = reg.regulation
-        timeline = reg.timeline
-        impact = reg.impact
-        description = reg.description
-        
-        # Format impact with color indicators using Markdown
-        impact_formatted = f"**{impact}**"
-        if impact == "Positive":
-            impact_formatted = f"**:green[{impact}]**"
-        elif impact == "Negative":
-            impact_formatted = f"**:red[{impact}]**"
-        elif impact == "Neutral":
-            impact_formatted = f"**:blue[{impact}]**"
-        
-        if regulation:
-            regulatory_considerations.append(f"* **{regulation}** - {timeline} ({impact_formatted}): {description}")
-        else:
-            regulatory_considerations.append(f"* {description}")
-    
-    # Join lists with single line breaks for Markdown list formatting
-    market_trends_text = "\n".join(market_trends)
-    competitive_landscape_text = "\n".join(competitive_landscape)
-    regulatory_considerations_text = "\n".join(regulatory_considerations)
-    
-    # Create a horizontal divider to separate sections
-    divider = "---"
-    
-    # Combine everything with clear section headers in Markdown format
-    combined_response = f"""
-## 📊 Historical Data Analysis
-{initial_response}
-
-{divider}
-
-## 📈 Market Trends
-{market_trends_text}
-
-{divider}
-
-## 🏢 Competitive Landscape
-{competitive_landscape_text}
-
-{divider}
-
-## 📝 Regulatory Considerations
-{regulatory_considerations_text}
+        Tuple[Optional[InventoryResponse], Optional[AugmentedResponse]]: The inventory
+        and augmented responses, None for the steps that were skipped
     """
+    async def skip():
+        return None
     
-    return combined_response
+    augment_task = (
+        assistant_client.aaugment_sales_response(sales_response, on_delta)
+        if should_augment else skip()
+    )
+    inventory_response, augmented_response = await asyncio.gather(inventory_task or skip(), augment_task)
+    return inventory_response, augmented_response
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
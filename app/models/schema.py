@@ -1,7 +1,12 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any, Union
+import msgspec
+from dataclasses import dataclass, field
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Annotated, List, Optional, Dict, Any, Union
 from datetime import datetime
 
+# Creation time of a query or response, shared by the models that record one
+Timestamp = Annotated[datetime, Field(default_factory=datetime.now, description="Timestamp of creation")]
+
 class SalesRecord(BaseModel):
     """
     Pydantic model for a single sales record.
@@ -21,7 +26,7 @@ class SalesQuery(BaseModel):
     Pydantic model for a user query about sales data.
     """
     query_text: str = Field(..., description="The natural language query from the user")
-    timestamp: datetime = Field(default_factory=datetime.now, description="Timestamp of the query")
+    timestamp: Timestamp
 
 class SalesResponse(BaseModel):
     """
@@ -30,35 +35,40 @@ class SalesResponse(BaseModel):
     query: str = Field(..., description="The original query from the user")
     response_text: str = Field(..., description="The natural language response to the query")
     data: Optional[Dict[str, Any]] = Field(None, description="Any structured data related to the response")
-    timestamp: datetime = Field(default_factory=datetime.now, description="Timestamp of the response")
+    timestamp: Timestamp
 
 class SalesAnalysisResponse(BaseModel):
     """
     Pydantic model the AI response to a sales query.
+    The products and time period come before the response text, so they are
+    generated (and can be acted on while streaming) before the long text.
     """
-    response_text: str = Field(
-        description="The natural language response to the query"
-    )
     class Product(BaseModel):
         name: str = Field(description="Name of a product mentioned in the query")
     products: list[Product]
     time_period: str = Field(
         description="Time period mentioned in the query (e.g., next month, this quarter)"
     )
+    response_text: str = Field(
+        description="The natural language response to the query"
+    )
 
-class ChatMessage(BaseModel):
+@dataclass(slots=True)
+class ChatMessage:
     """
-    Pydantic model for a chat message.
+    Chat message. A plain dataclass, since messages are created on every turn;
+    it is only validated when it is read from JSON.
     """
-    role: str = Field(..., description="The role of the message sender (user or assistant)")
-    content: str = Field(..., description="The content of the message")
-    timestamp: datetime = Field(default_factory=datetime.now, description="Timestamp of the message")
+    role: str  # The role of the message sender (user or assistant)
+    content: str  # The content of the message
+    timestamp: datetime = field(default_factory=datetime.now)  # Timestamp of the message
 
-class ChatHistory(BaseModel):
+@dataclass(slots=True)
+class ChatHistory:
     """
-    Pydantic model for chat history.
+    Chat history.
     """
-    messages: List[ChatMessage] = Field(default_factory=list, description="List of chat messages")
+    messages: List[ChatMessage] = field(default_factory=list)  # List of chat messages
 
 class SalesForecast(BaseModel):
     """
@@ -70,28 +80,96 @@ class SalesForecast(BaseModel):
     forecast_date: datetime
     confidence_level: float = Field(default=0.8, ge=0.0, le=1.0, description="Confidence level of the forecast")
 
+class MarketTrend(BaseModel):
+    """
+    Pydantic model for a market trend from the Assistant.
+    """
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    trend: str = Field(description="Market trend affecting the product")
+    impact: str = Field(description="What is the effect on the product, Positive, Neutral, Negative")
+    description: str = Field(description="Description of the trend")
+
+class Competitor(BaseModel):
+    """
+    Pydantic model for a competitor action from the Assistant.
+    """
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    competitor: str = Field(description="Competitor mentioned in the query")
+    action: str = Field(description="Action taken by the competitor")
+    impact: str = Field(description="What is the effect on the product, Positive, Neutral, Negative")
+    description: str = Field(description="Description of the competitor's action")
+
+class RegulatoryConsideration(BaseModel):
+    """
+    Pydantic model for a regulatory consideration from the Assistant.
+    """
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    regulation: str = Field(description="Regulation mentioned in the query")
+    timeline: str = Field(description="Timeline of the regulation")
+    impact: str = Field(description="What is the effect on the product, Positive, Neutral, Negative")
+    description: str = Field(description="Description of the regulation")
+
 class NewMarketInsights(BaseModel):
     """
     Pydantic model for market insights from the Assistant.
     """
-    class MarketTrend(BaseModel):
-        trend: str = Field(description="Market trend affecting the product")
-        impact: str = Field(description="What is the effect on the product, Positive, Neutral, Negative")
-        description: str = Field(description="Description of the trend")
     market_trends: list[MarketTrend]
-    class Competitor(BaseModel):
-        competitor: str = Field(description="Competitor mentioned in the query")
-        action: str = Field(description="Action taken by the competitor")
-        impact: str = Field(description="What is the effect on the product, Positive, Neutral, Negative")
-        description: str = Field(description="Description of the competitor's action")
     competitive_landscape: list[Competitor]
-    class RegulatoryConsideration(BaseModel):
-        regulation: str = Field(description="Regulation mentioned in the query")
-        timeline: str = Field(description="Timeline of the regulation")
-        impact: str = Field(description="What is the effect on the product, Positive, Neutral, Negative")
-        description: str = Field(description="Description of the regulation")
     regulatory_considerations: list[RegulatoryConsideration]
 
+class MarketTrendStruct(msgspec.Struct):
+    """
+    msgspec struct mirroring MarketTrend.
+    """
+    trend: str
+    impact: str
+    description: str
+
+class CompetitorStruct(msgspec.Struct):
+    """
+    msgspec struct mirroring Competitor.
+    """
+    competitor: str
+    action: str
+    impact: str
+    description: str
+
+class RegulatoryConsiderationStruct(msgspec.Struct):
+    """
+    msgspec struct mirroring RegulatoryConsideration.
+    """
+    regulation: str
+    timeline: str
+    impact: str
+    description: str
+
+class NewMarketInsightsStruct(msgspec.Struct):
+    """
+    msgspec struct for decoding the Assistant's market insights JSON.
+    Decoding and validating with msgspec is faster than pydantic; the result
+    is converted to NewMarketInsights without validating it again.
+    """
+    market_trends: list[MarketTrendStruct]
+    competitive_landscape: list[CompetitorStruct]
+    regulatory_considerations: list[RegulatoryConsiderationStruct]
+
+    def to_model(self) -> NewMarketInsights:
+        """Convert to the pydantic model without revalidating."""
+        return NewMarketInsights.model_construct(
+            market_trends=[
+                MarketTrend.model_construct(**msgspec.structs.asdict(trend))
+                for trend in self.market_trends
+            ],
+            competitive_landscape=[
+                Competitor.model_construct(**msgspec.structs.asdict(competitor))
+                for competitor in self.competitive_landscape
+            ],
+            regulatory_considerations=[
+                RegulatoryConsideration.model_construct(**msgspec.structs.asdict(regulation))
+                for regulation in self.regulatory_considerations
+            ]
+        )
+
 class MarketInsights(BaseModel):
     """
     Pydantic model for market insights from the Assistant.
@@ -100,8 +178,8 @@ class MarketInsights(BaseModel):
     competitive_landscape: List[Dict[str, str]] = Field(..., description="Competitive landscape analysis")
     regulatory_considerations: List[Dict[str, str]] = Field(..., description="Regulatory considerations")
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "market_trends": [
                     {"trend": "Growing fitness awareness", "impact": "Positive", "description": "8% growth in energy bar demand due to fitness trends"}
@@ -114,6 +192,7 @@ class MarketInsights(BaseModel):
                 ]
             }
         }
+    )
 
 class AugmentedResponse(BaseModel):
     """
@@ -121,26 +200,34 @@ class AugmentedResponse(BaseModel):
     """
     initial_response: SalesAnalysisResponse = Field(..., description="The initial sales response based on historical data")
     market_insights: NewMarketInsights = Field(..., description="Structured market insights from the Assistant")
-    timestamp: datetime = Field(default_factory=datetime.now, description="Timestamp of the augmented response") 
+    timestamp: Timestamp
 
 class InventoryResponse(BaseModel):
     answer: str = Field(description="The answer to the user's question.")
     source: str = Field(description="The inventory id of the answer.")
 
+class InventoryResponseStruct(msgspec.Struct):
+    """
+    msgspec struct for decoding the model's inventory response JSON.
+    """
+    answer: str
+    source: str
+
+    def to_model(self) -> InventoryResponse:
+        """Convert to the pydantic model without revalidating."""
+        return InventoryResponse.model_construct(answer=self.answer, source=self.source)
+
 class InventoryResponseSchema:
+    """
+    Response format for the inventory query, generated once at import time from
+    InventoryResponse so the two cannot drift apart.
+    """
     inventory_response_json_schema = {
-            "format": {
-                "type": "json_schema",
-                "name": "inventory_response",
-                "schema": {
-                    "type": "object",
-                    "properties": {
-                        "answer": {"type": "string"},
-                        "source": {"type": "string"},
-                    },
-                    "required": ["answer", "source"],
-                    "additionalProperties": False,
-                },
-                "strict": True,
-            }
-        }
\ No newline at end of file
+        "format": {
+            "type": "json_schema",
+            "name": "inventory_response",
+            # Strict structured outputs require additionalProperties to be false
+            "schema": {**InventoryResponse.model_json_schema(), "additionalProperties": False},
+            "strict": True,
+        }
+    }
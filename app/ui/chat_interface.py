@@ -6,7 +6,18 @@ from app.utils.logger import get_logger
 from app.utils.conversation_storage import ConversationStorage
 
 logger = get_logger()
-conversation_storage = ConversationStorage()
+
+@st.cache_resource(show_spinner=False)
+def get_conversation_storage() -> ConversationStorage:
+    """
+    Get the conversation storage, created once per process.
+    
+    Returns:
+        ConversationStorage: The conversation storage
+    """
+    return ConversationStorage()
+
+conversation_storage = get_conversation_storage()
 
 def initialize_chat_interface() -> Optional[str]:
     """
@@ -39,55 +50,7 @@ def initialize_chat_interface() -> Optional[str]:
     
     # User identification section
     with st.sidebar:
-        st.header("User Identification")
-        
-        # Get available users
-        available_users = conversation_storage.get_available_users()
-        
-        # Initialize username in session state if not exists
-        if "username" not in st.session_state:
-            st.session_state.username = ""
-            
-        # Determine if user is logged in
-        is_logged_in = st.session_state.username != ""
-        
-        if not is_logged_in:
-            # New user input
-            new_username = st.text_input("Enter your username to save conversations:")
-            
-            # Select existing user
-            if available_users:
-                st.write("Or select an existing user:")
-                selected_user = st.selectbox("Select user", [""] + available_users)
-                
-                if selected_user:
-                    new_username = selected_user
-            
-            # Login button
-            if st.button("Login") and new_username:
-                st.session_state.username = new_username
-                
-                # Load previous conversation if user exists
-                if new_username in available_users:
-                    st.session_state.chat_history = conversation_storage.load_conversation(new_username)
-                    st.rerun()
-        else:
-            # Show logged in user
-            st.success(f"Logged in as: {st.session_state.username}")
-            
-            # Logout button
-            if st.button("Logout"):
-                # Save conversation before logout
-                if len(st.session_state.chat_history.messages) > 0:
-                    conversation_storage.save_conversation(
-                        st.session_state.username, 
-                        st.session_state.chat_history
-                    )
-                
-                # Clear username and reset chat history
-                st.session_state.username = ""
-                st.session_state.chat_history = ChatHistory(messages=[])
-                st.rerun()
+        display_user_identification()
     
     st.markdown("""
     Ask questions about sales related data and get AI-powered insights.
@@ -111,6 +74,72 @@ def initialize_chat_interface() -> Optional[str]:
     
     return user_input
 
+@st.fragment
+def display_user_identification():
+    """
+    Display the login and logout controls in the sidebar.
+    
+    This is a fragment, so typing a username or selecting a user only reruns the
+    sidebar instead of the whole script.
+    """
+    st.header("User Identification")
+    
+    # Get available users
+    available_users = conversation_storage.get_available_users()
+    
+    # Initialize username in session state if not exists
+    if "username" not in st.session_state:
+        st.session_state.username = ""
+        
+    # Determine if user is logged in
+    is_logged_in = st.session_state.username != ""
+    
+    if not is_logged_in:
+        # New user input
+        new_username = st.text_input("Enter your username to save conversations:")
+        
+        # Select existing user
+        if available_users:
+            st.write("Or select an existing user:")
+            selected_user = st.selectbox("Select user", [""] + available_users)
+            
+            if selected_user:
+                new_username = selected_user
+        
+        # Login button
+        if st.button("Login") and new_username:
+            if not conversation_storage.is_valid_username(new_username):
+                st.error("Usernames may only contain letters, digits, '_', '.' and '-' (at most 64 characters).")
+            else:
+                st.session_state.username = new_username
+                
+                # Load previous conversation if user exists
+                if new_username in available_users:
+                    st.session_state.chat_history = conversation_storage.load_conversation(new_username)
+                    st.session_state.saved_message_count = len(st.session_state.chat_history.messages)
+                else:
+                    st.session_state.saved_message_count = 0
+                # Rerun the whole app so the header and chat history show the new user
+                st.rerun()
+    else:
+        # Show logged in user
+        st.success(f"Logged in as: {st.session_state.username}")
+        
+        # Logout button
+        if st.button("Logout"):
+            # Save conversation before logout
+            if len(st.session_state.chat_history.messages) > 0:
+                conversation_storage.save_conversation(
+                    st.session_state.username, 
+                    st.session_state.chat_history
+                )
+            
+            # Clear username and reset chat history
+            st.session_state.username = ""
+            st.session_state.chat_history = ChatHistory(messages=[])
+            st.session_state.saved_message_count = 0
+            st.rerun()
+
 def display_chat_history():
     """
     Display the chat history.
@@ -130,7 +159,7 @@ def add_user_message(message: str):
         message (str): The user message
     """
     # Log the user message
-    logger.info(f"User message: {message}")
+    logger.info("User message: {}", message)
     
     # Create a chat message
     chat_message = ChatMessage(
@@ -138,8 +167,10 @@ def add_user_message(message: str):
         content=message
     )
     
-    # Add the message to the chat history
+    # Add the message to the chat history and show it below the history drawn so far
     st.session_state.chat_history.messages.append(chat_message)
+    with st.chat_message(chat_message.role):
+        st.write(chat_message.content)
 
 def add_assistant_message(message: str):
     """
@@ -149,7 +180,7 @@ def add_assistant_message(message: str):
         message (str): The assistant message
     """
     # Log the assistant message
-    logger.debug(f"Assistant message: {message}")
+    logger.debug("Assistant message: {}", message)
     
     # Create a chat message
     chat_message = ChatMessage(
@@ -157,12 +188,18 @@ def add_assistant_message(message: str):
         content=message
     )
     
-    # Add the message to the chat history
+    # Add the message to the chat history and show it below the history drawn so far
     st.session_state.chat_history.messages.append(chat_message)
+    with st.chat_message(chat_message.role):
+        st.write(chat_message.content)
     
-    # Save conversation if user is logged in
+    # Save the messages added since the last save if user is logged in, appending
+    # them rather than rewriting the whole conversation
     if st.session_state.username:
-        conversation_storage.save_conversation(
+        messages = st.session_state.chat_history.messages
+        saved_message_count = st.session_state.get("saved_message_count", 0)
+        if conversation_storage.save_new_messages(
             st.session_state.username,
-            st.session_state.chat_history
-        )
+            messages[saved_message_count:]
+        ):
+            st.session_state.saved_message_count = len(messages)
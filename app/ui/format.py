@@ -0,0 +1,79 @@
+from typing import Optional
+from app.models.schema import AugmentedResponse
+
+# Markdown for each impact, with a color indicator
+_IMPACT_FORMATS = {
+    "Positive": "**:green[Positive]**",
+    "Negative": "**:red[Negative]**",
+    "Neutral": "**:blue[Neutral]**"
+}
+
+def _render_insight_items(items: list, name_field: str, detail_field: Optional[str] = None) -> str:
+    """
+    Format market insight items as a Markdown list.
+    
+    Args:
+        items (list): The insight items, each with an impact and a description
+        name_field (str): Field holding the name of the item, shown in bold
+        detail_field (Optional[str]): Field shown after the name, if any
+        
+    Returns:
+        str: The items as Markdown list lines
+    """
+    lines = []
+    for item in items:
+        name = getattr(item, name_field)
+        if not name:
+            lines.append(f"* {item.description}")
+            continue
+        impact_formatted = _IMPACT_FORMATS.get(item.impact, f"**{item.impact}**")
+        detail = f" - {getattr(item, detail_field)}" if detail_field else ""
+        lines.append(f"* **{name}**{detail} ({impact_formatted}): {item.description}")
+    return "\n".join(lines)
+
+def format_augmented_response(augmented_response: AugmentedResponse) -> str:
+    """
+    Format an augmented response for display using Markdown for better Streamlit presentation.
+    
+    Args:
+        augmented_response (AugmentedResponse): The augmented response
+        
+    Returns:
+        str: The formatted response in Markdown format
+    """
+    # Get the initial response
+    initial_response = augmented_response.initial_response.response_text
+    
+    # Get the market insights
+    market_insights = augmented_response.market_insights
+    
+    # Format the insights as Markdown lists, one item per line
+    market_trends_text = _render_insight_items(market_insights.market_trends, "trend")
+    competitive_landscape_text = _render_insight_items(market_insights.competitive_landscape, "competitor", "action")
+    regulatory_considerations_text = _render_insight_items(market_insights.regulatory_considerations, "regulation", "timeline")
+    
+    # Create a horizontal divider to separate sections
+    divider = "---"
+    
+    # Combine everything with clear section headers in Markdown format
+    combined_response = f"""
+## 📊 Historical Data Analysis
+{initial_response}
+
+{divider}
+
+## 📈 Market Trends
+{market_trends_text}
+
+{divider}
+
+## 🏢 Competitive Landscape
+{competitive_landscape_text}
+
+{divider}
+
+## 📝 Regulatory Considerations
+{regulatory_considerations_text}
+    """
+    
+    return combined_response
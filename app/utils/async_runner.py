@@ -0,0 +1,39 @@
+import asyncio
+import threading
+import concurrent.futures
+from typing import Any, Coroutine
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+# Run a single event loop in a daemon thread for the whole process. The async
+# OpenAI clients and their connection pool are bound to the loop they first ran
+# on, so every coroutine is scheduled here rather than on a new loop per rerun.
+_loop = asyncio.new_event_loop()
+_thread = threading.Thread(target=_loop.run_forever, name="async-runner", daemon=True)
+_thread.start()
+logger.info("Background event loop started")
+
+def submit_async(coro: Coroutine[Any, Any, Any]) -> concurrent.futures.Future:
+    """
+    Schedule a coroutine on the shared event loop without waiting for it.
+    
+    Args:
+        coro (Coroutine): The coroutine to run
+        
+    Returns:
+        concurrent.futures.Future: Future for the result of the coroutine
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _loop)
+
+def run_async(coro: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Run a coroutine on the shared event loop and block until it finishes.
+    
+    Args:
+        coro (Coroutine): The coroutine to run
+        
+    Returns:
+        Any: The result of the coroutine
+    """
+    return submit_async(coro).result()
@@ -1,11 +1,27 @@
 import os
-import json
+import re
+import msgspec
 from typing import List, Dict, Any
 from app.models.schema import ChatHistory, ChatMessage
 from app.utils.logger import get_logger
 
 logger = get_logger()
 
+# Conversations are stored as JSON Lines, one message per line, so a new message is
+# appended instead of rewriting the whole conversation
+_FILE_SUFFIX = '.jsonl'
+# Conversations saved before, as a single JSON document
+_LEGACY_FILE_SUFFIX = '.json'
+
+# Usernames become file names, so only allow characters that cannot leave the storage directory
+_USERNAME_PATTERN = re.compile(r'[A-Za-z0-9_.-]{1,64}')
+
+# msgspec encodes and decodes the chat dataclasses directly, parsing and building
+# them in one native pass. All stored messages are decoded in a single call.
+_MESSAGE_ENCODER = msgspec.json.Encoder()
+_MESSAGES_DECODER = msgspec.json.Decoder(ChatMessage)
+_CHAT_HISTORY_DECODER = msgspec.json.Decoder(ChatHistory)
+
 class ConversationStorage:
     def __init__(self, storage_dir="conversations"):
         """
@@ -17,6 +33,27 @@ class ConversationStorage:
         # Create storage directory if it doesn't exist
         self.storage_dir = storage_dir
         os.makedirs(self.storage_dir, exist_ok=True)
+        
+        # Conversation file paths per username and suffix, built once per user
+        self._filepaths = {}
+        
+        # Scan the directory once, afterwards the set is kept up to date on save
+        self._users = set()
+        try:
+            with os.scandir(self.storage_dir) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    username, suffix = os.path.splitext(entry.name)
+                    if suffix not in (_FILE_SUFFIX, _LEGACY_FILE_SUFFIX):
+                        continue
+                    # Files saved before usernames were validated cannot be logged into, so leave them out
+                    if not self.is_valid_username(username):
+                        logger.warning(f"Skipping conversation file with invalid username: {entry.name}")
+                        continue
+                    self._users.add(username)
+        except OSError as e:
+            logger.error(f"Error getting available users: {str(e)}")
         logger.info(f"Conversation storage initialized at {self.storage_dir}")
         
     def get_available_users(self) -> List[str]:
@@ -26,20 +63,45 @@ class ConversationStorage:
         Returns:
             List[str]: List of usernames
         """
-        users = []
-        try:
-            for filename in os.listdir(self.storage_dir):
-                if filename.endswith('.json'):
-                    username = filename.replace('.json', '')
-                    users.append(username)
-            return users
-        except Exception as e:
-            logger.error(f"Error getting available users: {str(e)}")
-            return []
+        return sorted(self._users)
+        
+    def is_valid_username(self, username: str) -> bool:
+        """
+        Check whether a username can be used to store conversations.
+        
+        Args:
+            username (str): Username
+            
+        Returns:
+            bool: True if the username only contains letters, digits, '_', '.' and '-'
+        """
+        return _USERNAME_PATTERN.fullmatch(username) is not None
     
+    def _get_filepath(self, username: str, suffix: str = _FILE_SUFFIX) -> str:
+        """
+        Get the path of a user's conversation file.
+        
+        Args:
+            username (str): Username
+            suffix (str): File suffix
+            
+        Returns:
+            str: Path of the conversation file
+            
+        Raises:
+            ValueError: If the username is not valid
+        """
+        filepath = self._filepaths.get((username, suffix))
+        if filepath is None:
+            if not self.is_valid_username(username):
+                raise ValueError(f"Invalid username: {username!r}")
+            filepath = os.path.join(self.storage_dir, f"{username}{suffix}")
+            self._filepaths[(username, suffix)] = filepath
+        return filepath
+        
     def save_conversation(self, username: str, chat_history: ChatHistory) -> bool:
         """
-        Save a user's conversation.
+        Save a user's conversation, replacing any saved messages.
         
         Args:
             username (str): Username
@@ -53,28 +115,43 @@ class ConversationStorage:
             return False
             
         try:
-            # Convert chat history to dictionary
-            history_dict = {
-                "messages": [
-                    {
-                        "role": msg.role,
-                        "content": msg.content,
-                        "timestamp": msg.timestamp.isoformat()
-                    } for msg in chat_history.messages
-                ]
-            }
-            
             # Save to file
-            filepath = os.path.join(self.storage_dir, f"{username}.json")
-            with open(filepath, 'w') as f:
-                json.dump(history_dict, f, indent=2)
-                
+            with open(self._get_filepath(username), 'wb') as f:
+                f.write(_MESSAGE_ENCODER.encode_lines(chat_history.messages))
+            self._users.add(username)
+            
             logger.info(f"Saved conversation for user {username}")
             return True
         except Exception as e:
             logger.error(f"Error saving conversation for user {username}: {str(e)}")
             return False
-    
+            
+    def save_new_messages(self, username: str, messages: List[ChatMessage]) -> bool:
+        """
+        Append new messages to a user's saved conversation.
+        
+        Args:
+            username (str): Username
+            messages (List[ChatMessage]): Messages added since the conversation was last saved
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not username:
+            logger.warning("No username provided, messages not saved")
+            return False
+            
+        try:
+            with open(self._get_filepath(username), 'ab') as f:
+                f.write(_MESSAGE_ENCODER.encode_lines(messages))
+            self._users.add(username)
+            
+            logger.info(f"Saved {len(messages)} new messages for user {username}")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving messages for user {username}: {str(e)}")
+            return False
+            
     def load_conversation(self, username: str) -> ChatHistory:
         """
         Load a user's conversation.
@@ -89,27 +166,29 @@ class ConversationStorage:
             logger.warning("No username provided, returning empty conversation")
             return ChatHistory(messages=[])
             
-        filepath = os.path.join(self.storage_dir, f"{username}.json")
-        
         try:
+            filepath = self._get_filepath(username)
+            legacy_filepath = self._get_filepath(username, _LEGACY_FILE_SUFFIX)
+            
             if os.path.exists(filepath):
-                with open(filepath, 'r') as f:
-                    history_dict = json.load(f)
-                
-                # Convert dictionary to ChatHistory
-                messages = []
-                for msg in history_dict["messages"]:
-                    messages.append(ChatMessage(
-                        role=msg["role"],
-                        content=msg["content"],
-                        timestamp=msg["timestamp"]
-                    ))
+                with open(filepath, 'rb') as f:
+                    messages = _MESSAGES_DECODER.decode_lines(f.read())
                 
                 logger.info(f"Loaded conversation for user {username}")
                 return ChatHistory(messages=messages)
+            elif os.path.exists(legacy_filepath):
+                with open(legacy_filepath, 'rb') as f:
+                    chat_history = _CHAT_HISTORY_DECODER.decode(f.read())
+                    
+                # Convert to the current format, so new messages can be appended to it
+                if self.save_conversation(username, chat_history):
+                    os.remove(legacy_filepath)
+                    
+                logger.info(f"Loaded conversation for user {username}")
+                return chat_history
             else:
                 logger.info(f"No existing conversation for user {username}")
                 return ChatHistory(messages=[])
         except Exception as e:
             logger.error(f"Error loading conversation for user {username}: {str(e)}")
-            return ChatHistory(messages=[]) 
\ No newline at end of file
+            return ChatHistory(messages=[])
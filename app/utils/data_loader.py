@@ -1,10 +1,28 @@
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import os
 from datetime import datetime
 from app.utils.logger import get_logger
 
 logger = get_logger()
 
+# Columns used by the analysis
+_REQUIRED_COLUMNS = ['Date', 'Product', 'Sales_Units', 'Revenue']
+
+# Parse dates and numbers while reading, so they need no second conversion pass
+_CONVERT_OPTIONS = pacsv.ConvertOptions(
+    column_types={'Date': pa.timestamp('ns'), 'Sales_Units': pa.int32(), 'Revenue': pa.float64()},
+    strings_can_be_null=True
+)
+# Used when a file has malformed values, which fail the typed read: the columns are
+# read as strings and converted in pandas, where malformed values become missing
+_RAW_CONVERT_OPTIONS = pacsv.ConvertOptions(
+    column_types={col: pa.string() for col in _REQUIRED_COLUMNS},
+    strings_can_be_null=True
+)
+
 def load_sales_data(file_path: str) -> pd.DataFrame:
     """
     Load sales data from a CSV file.
@@ -23,16 +41,26 @@ def load_sales_data(file_path: str) -> pd.DataFrame:
             logger.error(f"File not found: {file_path}")
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        # Read CSV file
-        df = pd.read_csv(file_path)
+        # Read CSV file with the multithreaded pyarrow parser
+        has_malformed_values = False
+        try:
+            table = pacsv.read_csv(file_path, convert_options=_CONVERT_OPTIONS)
+        except pa.ArrowInvalid as e:
+            logger.warning(f"Malformed values in {file_path}, dropping the affected rows: {str(e)}")
+            table = pacsv.read_csv(file_path, convert_options=_RAW_CONVERT_OPTIONS)
+            has_malformed_values = True
         
         # Check if required columns exist
-        required_columns = ['Date', 'Product', 'Sales_Units', 'Revenue']
-        for col in required_columns:
-            if col not in df.columns:
+        for col in _REQUIRED_COLUMNS:
+            if col not in table.column_names:
                 logger.error(f"Required column {col} not found in {file_path}")
                 raise ValueError(f"Required column {col} not found in {file_path}")
         
+        # Keep only the columns used by the analysis
+        df = table.select(_REQUIRED_COLUMNS).to_pandas()
+        if has_malformed_values:
+            df = coerce_sales_data(df)
+        
         # Preprocess data
         df = preprocess_sales_data(df)
         
@@ -43,6 +71,21 @@ def load_sales_data(file_path: str) -> pd.DataFrame:
         logger.error(f"Error loading sales data: {str(e)}")
         raise
 
+def coerce_sales_data(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert sales data read as strings to dates and numbers.
+    
+    Args:
+        df (pd.DataFrame): Sales data with string columns
+        
+    Returns:
+        pd.DataFrame: Sales data with malformed values as missing values
+    """
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    df['Sales_Units'] = pd.to_numeric(df['Sales_Units'], errors='coerce')
+    df['Revenue'] = pd.to_numeric(df['Revenue'], errors='coerce')
+    return df
+
 def preprocess_sales_data(df: pd.DataFrame) -> pd.DataFrame:
     """
     Preprocess sales data.
@@ -53,23 +96,42 @@ def preprocess_sales_data(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Preprocessed sales data
     """
-    # Convert Date column to datetime
-    df['Date'] = pd.to_datetime(df['Date'])
+    # Handle missing values. Date, Sales_Units and Revenue are typed by the CSV reader.
+    df = df.dropna()
     
-    # Ensure Sales_Units and Revenue are numeric
-    df['Sales_Units'] = pd.to_numeric(df['Sales_Units'], errors='coerce')
-    df['Revenue'] = pd.to_numeric(df['Revenue'], errors='coerce')
+    # Store products as categorical codes, which group faster and take less memory than strings
+    df['Product'] = df['Product'].astype('category')
+    df['Sales_Units'] = pd.to_numeric(df['Sales_Units'], downcast='integer')
     
-    # Handle missing values
-    df = df.dropna()
+    # Add derived columns that might be useful for analysis, in the smallest integer types that fit.
+    # Year and month both come from a single conversion to months since 1970.
+    dates = df['Date'].to_numpy()
+    months = dates.astype('datetime64[M]').astype(np.int64)
+    df['Year'] = (months // 12 + 1970).astype('int16')
+    df['Month'] = (months % 12 + 1).astype('int8')
+    df['Week'] = _iso_week(dates)
+    df['Quarter'] = ((df['Month'] - 1) // 3 + 1).astype('int8')
     
-    # Add derived columns that might be useful for analysis
-    df['Year'] = df['Date'].dt.year
-    df['Month'] = df['Date'].dt.month
-    df['Week'] = df['Date'].dt.isocalendar().week
-    df['Quarter'] = df['Date'].dt.quarter
+    # Calculate Average Price per Unit, weeks without sales have no price
+    revenue = df['Revenue'].to_numpy(dtype=np.float64)
+    sales_units = df['Sales_Units'].to_numpy(dtype=np.float64)
+    df['Price_Per_Unit'] = np.divide(revenue, sales_units, out=np.full(len(df), np.nan), where=sales_units != 0)
     
-    # Calculate Average Price per Unit
-    df['Price_Per_Unit'] = df['Revenue'] / df['Sales_Units']
+    return df
+
+def _iso_week(dates: np.ndarray) -> np.ndarray:
+    """
+    Get the ISO 8601 week numbers of dates.
     
-    return df 
\ No newline at end of file
+    Args:
+        dates (np.ndarray): datetime64 dates
+        
+    Returns:
+        np.ndarray: Week numbers (1-53)
+    """
+    # An ISO week belongs to the year of its Thursday. 1970-01-01 was a Thursday,
+    # so (days + 3) % 7 is the weekday with Monday as 0.
+    days = dates.astype('datetime64[D]').astype(np.int64)
+    thursdays = days - (days + 3) % 7 + 3
+    year_starts = thursdays.astype('datetime64[D]').astype('datetime64[Y]').astype('datetime64[D]').astype(np.int64)
+    return ((thursdays - year_starts) // 7 + 1).astype('int8')
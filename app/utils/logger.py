@@ -7,8 +7,10 @@ os.makedirs("logs", exist_ok=True)
 
 # Configure logger
 logger.remove()  # Remove default handler
-logger.add(sys.stderr, level="INFO")  # Add stderr handler with INFO level
-logger.add("logs/app.log", rotation="10 MB", level="DEBUG")  # Add file handler with DEBUG level
+# Records are written by a background thread (enqueue), so logging never blocks the app on I/O.
+# backtrace/diagnose are off, so exceptions are logged without inspecting every frame's variables.
+logger.add(sys.stderr, level="INFO", enqueue=True, backtrace=False, diagnose=False)  # Add stderr handler with INFO level
+logger.add("logs/app.log", rotation="10 MB", level="DEBUG", enqueue=True, backtrace=False, diagnose=False)  # Add file handler with DEBUG level
 
 def get_logger():
     """